@@ -1,9 +1,12 @@
-import pygame as pg
-from pygame import *
 import os
 import sys
+import contextlib
+with contextlib.redirect_stdout(sys.stderr): # keep stdout clean, e.g. for epg.bench's JSON
+    import pygame as pg
+from pygame import *
 import asyncio
 import warnings
+from time import perf_counter
 
 __version__ = "0.0a0.dev0"
 
@@ -18,7 +21,8 @@ def check_attr(kw, attr):
     if len(bad) > 0:
         throw("invalid argument(s):", bad)
 
-def init(size=(0, 0), caption=None, icon=None, fps=60, appcls=None, ime=True, **kw):
+def init(size=(0, 0), caption=None, icon=None, fps=60, appcls=None, ime=True,
+         async_pacing=False, **kw):
     '''Initialize and set the pygame window'''
     global app, clock, game_fps
 
@@ -28,6 +32,7 @@ def init(size=(0, 0), caption=None, icon=None, fps=60, appcls=None, ime=True, **
     pg.init()
     screen = pg.display.set_mode(size, **kw)
     app = (appcls and appcls()) or App()
+    app.async_pacing = async_pacing
 
     clock = pg.time.Clock()
     game_fps = fps
@@ -51,18 +56,27 @@ def get_path(relative_path):
 def get_asset(path):
     return get_path(os.path.join(assets, path))    
 
-time_offset = 0
 def get_time():
-    '''Return the game time minus the event.get() loss'''
-    return pg.time.get_ticks() - time_offset
+    '''Return the time (ms) of the current game clock, minus the event.get() loss'''
+    return timer.current.get_time()
 
 def test_fps():
     '''Set the caption to FPS in order to test the game'''
     display.set_caption(str(clock.get_fps()))
 
-def update_display():
-    clock.tick(game_fps)
-    display.flip()
+def update_display(rects=None, profiler=None):
+    '''Wait for the next frame, then flip the display (or only update [rects])'''
+    if app.async_pacing:
+        clock.tick() # App.wait_frame() does the waiting
+    else:
+        clock.tick(game_fps)
+    if profiler: profiler.lap("tick")
+
+    if rects is None:
+        display.flip()
+    else:
+        display.update(rects)
+    if profiler: profiler.lap("flip")
 
 class App:
     def __init__(self, screen=None, scene=None):
@@ -71,6 +85,8 @@ class App:
         self.attr = {}
         self.cached = {}
         self.app_running = False
+        self.async_pacing = False
+        self.deadline = None
         self.init()
 
     def __getitem__(self, key):
@@ -95,6 +111,7 @@ class App:
         if scene: self.switch(scene)
 
         self.app_running = True
+        self.deadline = perf_counter()
         while self.app_running:
             scene = self.scene
 
@@ -102,10 +119,29 @@ class App:
             while self.scene.scene_running:
                 self.scene.single_run()
 
-                await asyncio.sleep(0)
+                await self.wait_frame()
                 
             if self.scene == scene: self.quit()
 
+    async def wait_frame(self):
+        '''Yield to other coroutines, until the next frame deadline if async_pacing'''
+        if not (self.async_pacing and game_fps):
+            await asyncio.sleep(0)
+            return
+
+        now = perf_counter()
+        self.deadline += 1 / game_fps
+        if self.deadline < now: # fell behind, do not try to catch up
+            self.deadline = now
+        await asyncio.sleep(self.deadline - now)
+
+    def preload(self, scene, name=None, assets=None, switch=False, **kw):
+        '''Load the assets of [scene] in the background while the current scene runs'''
+        loader = preload.Preloader(scene, assets, name, switch, app=self, **kw)
+        if self.scene is not None:
+            loader.attach(self.scene)
+        return loader
+
     def quit(self):
         self.app_running = False
         self.scene.quit()
@@ -121,20 +157,39 @@ class App:
             self.scene.quit()
             ##if sync_screen:
             ##    self.scene.screen = scene.screen ## TODO
-        self.scene = scene
+        old, self.scene = self.scene, scene
+        timer.current = scene.game_clock or timer.default
+        cache.default.set_scope(scene)
+        if old is not None and old is not scene and \
+           not any(old is s for s in self.cached.values()):
+            cache.default.release(old)
+        scene.redraw()
+        scene.dispatcher.activate()
         
 import epg.locals as locals
 import epg.collision as collision
 import epg.data as data
+import epg.cache as cache
 import epg.math as math
 import epg.mixer as mixer
+import epg.profiler as profiler
+import epg.preload as preload
+import epg.dispatch as dispatch
+import epg.timer as timer
+import epg.jobs as jobs
+import epg.replay as replay
+import epg.spatial as spatial
 import epg.image as image
+import epg.atlas as atlas
 import epg.mask as mask
 import epg.action as action
 import epg.scene as scene
 import epg.font as font
 import epg.renderer as renderer
 import epg.sprite as sprite
+import epg.camera as camera
+import epg.tilemap as tilemap
+import epg.streaming as streaming
 import epg.ui as ui
 
 from .font import text_render
@@ -142,6 +197,8 @@ from .scene import Scene, AScene
 from .sprite import Sprite, Static, AStatic, Dynamic, ADynamic, OsDynamic, OsADynamic
 from .mixer import MusicManager, play_music, play_sound
 from .image import Animation, SpriteSheet, FileSheet, load_sheet
+from .profiler import Profiler
+from .timer import GameClock
 
 load_font = font.load
 get_image = image.get
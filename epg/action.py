@@ -1,11 +1,14 @@
 import epg
 import math
+import operator
 from functools import partial
 
 class ActionManager:
     def __init__(self, sprite, actions, end_func=None, cover=True):
         self.sprite = sprite
-        self.sprite.orig_image = sprite.image.copy()
+        self.source = actions
+        self.source_image = sprite.image
+        self.buffer = self.sprite.orig_image = sprite.image.copy()
         self.sprite.orig_rect = sprite.rect.copy()
 
         if actions and actions[0]:
@@ -23,6 +26,21 @@ class ActionManager:
     def __bool__(self):
         return bool(self.generator)
 
+    def restart(self, end_func=None):
+        '''Run the copied actions again from the start, e.g. for a reused sprite.
+The copy of the original image is kept if sprite.image is still the same surface.'''
+        s = self.sprite
+        if s.image is not self.source_image:
+            self.source_image, self.buffer = s.image, s.image.copy()
+        s.orig_image, s.orig_rect = self.buffer, s.rect.copy()
+
+        if self.actions:
+            self.generator = self.actions.generate(s)
+            self.generator.send(None)
+        if end_func: self.end_func = end_func
+        self.covers.clear()
+        self.update()
+
     def add_cover(self, func):
         if func: self.covers.append(func)
 
@@ -61,9 +79,10 @@ class ActionManager:
 class ActionObject: # TODO: action sprite bind
     def __init__(self, actions, end_func):
         self.end_func = end_func
-        self.manager = None
+        # a pooled sprite being reinitialized keeps its manager for restart()
+        self.manager = getattr(self, "manager", None) if actions else None
         if actions:
-            self.act(*actions, end_func=end_func)
+            self.restart(*actions, end_func=end_func)
 
     def add_cover(self, func):
         self.manager.add_cover(func)
@@ -76,6 +95,17 @@ class ActionObject: # TODO: action sprite bind
         if end_func: self.end_func = end_func
         self.manager = ActionManager(self, actions, self.end_func, cover)
 
+    def restart(self, *actions, end_func=None, cover=True):
+        '''Like act(), but reuse the manager (and its copy of the actions) if
+[actions] are the same objects as last time'''
+        m = self.manager
+        if m is not None and m.cover == cover and len(m.source) == len(actions) and \
+           all(map(operator.is_, m.source, actions)):
+            if end_func: self.end_func = end_func
+            m.restart(self.end_func)
+        else:
+            self.act(*actions, end_func=end_func, cover=cover)
+
     def stop(self, call_end_func=False):
         if call_end_func:
             self.end_func(self, self.manager.actions)
@@ -0,0 +1,152 @@
+'''Runtime texture atlases
+
+    atlas = Atlas()
+    atlas.add("player.png")
+    atlas.add_sheet("coin", epg.load_sheet("coin.png", x=8, y=1))
+    image = atlas["player.png"] # subsurface of a page
+'''
+import os
+import json
+import pygame as pg
+import epg
+
+class Atlas:
+    '''Pack many small images into a few large pages (shelf packing). Images are
+looked up by name and returned as subsurfaces sharing the pixels of their page.'''
+    def __init__(self, size=(1024, 1024), padding=1):
+        self.size = tuple(size)
+        self.padding = padding
+        self.pages = []
+        self.shelves = [] # per page: [[y, height, x], ...]
+        self.tops = [] # per page: y of the next shelf
+        self.rects = {} # name -> (page, (x, y, w, h))
+        self.images = {} # name -> subsurface
+        self.sheets = {} # name -> frame count
+
+    def __len__(self):
+        return len(self.images)
+
+    def __contains__(self, name):
+        return name in self.images
+
+    def __getitem__(self, name):
+        return self.images[name]
+
+    def get(self, name, default=None):
+        return self.images.get(name, default)
+
+    def new_page(self, size):
+        page = pg.Surface(size, pg.SRCALPHA)
+        if pg.display.get_surface() is not None:
+            page = page.convert_alpha()
+        page.fill((0, 0, 0, 0))
+        self.pages.append(page)
+        self.shelves.append([])
+        self.tops.append(0)
+        return len(self.pages) - 1
+
+    def find(self, w, h):
+        '''Return (page, x, y) of a free area of w x h, opening shelves or pages'''
+        W, H = self.size
+        best = None
+        for i, shelves in enumerate(self.shelves):
+            for shelf in shelves:
+                if shelf[1] >= h and shelf[2] + w <= self.pages[i].get_width():
+                    if best is None or shelf[1] < best[1][1]:
+                        best = i, shelf
+            if best is not None:
+                break
+        if best is not None:
+            i, shelf = best
+            x = shelf[2]
+            shelf[2] += w
+            return i, x, shelf[0]
+
+        if w > W or h > H: # own page
+            i = self.new_page((w, h))
+            self.tops[i] = h
+            return i, 0, 0
+        for i, top in enumerate(self.tops):
+            if top + h <= self.pages[i].get_height() and w <= self.pages[i].get_width():
+                break
+        else:
+            i = self.new_page(self.size)
+        self.shelves[i].append([self.tops[i], h, w])
+        self.tops[i] += h
+        return i, 0, self.shelves[i][-1][0]
+
+    def add(self, name, surf=None):
+        '''Pack [surf] (loaded by epg.image.get(name) by default) as [name]'''
+        if name in self.images:
+            return self.images[name]
+        if surf is None:
+            surf = epg.image.get(name)
+        w, h = surf.get_size()
+        p = self.padding
+        i, x, y = self.find(w + p, h + p)
+        page = self.pages[i]
+        rect = pg.Rect(x, y, w, h)
+        if surf.get_flags() & pg.SRCALPHA: # exact copy, alpha included
+            page.fill((255, 255, 255, 255), rect)
+            page.blit(surf, rect, special_flags=pg.BLEND_RGBA_MIN)
+        else:
+            page.blit(surf, rect)
+        self.rects[name] = i, tuple(rect)
+        image = self.images[name] = page.subsurface(rect)
+        return image
+
+    def add_many(self, items):
+        '''Pack {name:surf} (or names) tallest first, which packs shelves tighter'''
+        if not isinstance(items, dict):
+            items = {name:epg.image.get(name) for name in items}
+        for name, surf in sorted(items.items(), key=lambda i:-i[1].get_height()):
+            self.add(name, surf)
+        return [self.images[name] for name in items]
+
+    def add_sheet(self, name, sheet):
+        '''Pack the frames of a SpriteSheet (or anything epg.image.get_frames takes)
+as "[name]:0", "[name]:1"...'''
+        frames = epg.image.get_frames(sheet)
+        for i, frame in enumerate(frames):
+            self.add("%s:%d"%(name, i), frame)
+        self.sheets[name] = len(frames)
+        return self.get_frames(name)
+
+    def get_frames(self, name):
+        return [self.images["%s:%d"%(name, i)] for i in range(self.sheets[name])]
+
+    def get_sheet(self, name, id=0):
+        '''Return the packed frames of [name] as a FileSheet (e.g. for an Animation)'''
+        return epg.image.FileSheet(self.get_frames(name), id)
+
+    def save(self, path):
+        '''Save the pages as [path]_0.png... and the index as the JSON file [path]'''
+        base = os.path.splitext(path)[0]
+        files = []
+        for i, page in enumerate(self.pages):
+            file = "%s_%d.png"%(base, i)
+            pg.image.save(page, file)
+            files.append(os.path.basename(file))
+        index = {"size":self.size, "padding":self.padding, "pages":files,
+                 "shelves":self.shelves, "tops":self.tops, "rects":self.rects,
+                 "sheets":self.sheets}
+        with open(path, "w") as f:
+            json.dump(index, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            index = json.load(f)
+        atlas = cls(index["size"], index["padding"])
+        dir = os.path.dirname(path)
+        for file in index["pages"]:
+            page = pg.image.load(os.path.join(dir, file))
+            if pg.display.get_surface() is not None:
+                page = page.convert_alpha()
+            atlas.pages.append(page)
+        atlas.shelves, atlas.tops = index["shelves"], index["tops"]
+        atlas.sheets = index["sheets"]
+        for name, (i, rect) in index["rects"].items():
+            atlas.rects[name] = i, tuple(rect)
+            atlas.images[name] = atlas.pages[i].subsurface(rect)
+        return atlas
@@ -0,0 +1,138 @@
+'''Headless benchmark of Scene subclasses
+
+    python -m epg.bench package.module:SceneClass [--frames 600] [--baseline bench.json] [--save]
+                                                  [--replay session.rec]
+'''
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import epg
+
+METRICS = ("mean", "p50", "p95", "p99")
+
+def init(size=(640, 480), **kw):
+    '''Initialize epg with SDL's dummy video/audio drivers and no frame pacing'''
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    return epg.init(size, fps=0, ime=False, **kw)
+
+def get_scene_class(target):
+    '''Import "package.module:SceneClass"'''
+    module, _, name = target.partition(":")
+    if not name:
+        epg.throw("expected 'module:SceneClass', got", repr(target))
+    return getattr(importlib.import_module(module), name)
+
+def run(scene, frames=600, warmup=60, size=(640, 480), replay=None, **scenekw):
+    '''Run [scene] (a Scene or a Scene subclass) for [frames] frames, return the report.
+With [replay], feed the scene a recording (Scene.record) instead of warming up.'''
+    if getattr(epg, "app", None) is None:
+        init(size)
+    if not isinstance(scene, epg.Scene):
+        scene = scene(**scenekw)
+    epg.app.switch(scene)
+    if replay:
+        scene.replay(replay)
+        warmup = 0
+
+    profiler = scene.set_profiler(max(frames, 1))
+    scene.scene_running = True
+    for _ in range(warmup):
+        if not scene.scene_running: break
+        scene.single_run()
+    profiler.clear()
+
+    count = 0
+    start = time.perf_counter()
+    while count < frames and scene.scene_running:
+        scene.single_run()
+        count += 1
+    seconds = time.perf_counter() - start
+    scene.unset_profiler()
+
+    return {
+        "scene":type(scene).__name__,
+        "frames":count,
+        "seconds":seconds,
+        "fps":count / seconds if seconds else None,
+        "phases":{name:{m:d[m] for m in METRICS} for name, d in profiler.stats().items()},
+        }
+
+def compare(report, baseline, tolerance=0.1, min_ms=0.05):
+    '''Compare [report] against a [baseline] report of the same scene.
+Return {"fps": ratio, "phases": {phase: {metric: ratio}}, "regressions": [...]}'''
+    result = {"fps":None, "phases":{}, "regressions":[]}
+    if report["fps"] and baseline.get("fps"):
+        result["fps"] = ratio = report["fps"] / baseline["fps"]
+        if ratio < 1 - tolerance:
+            result["regressions"].append("fps")
+
+    for name, metrics in report["phases"].items():
+        base = baseline.get("phases", {}).get(name)
+        if not base:
+            continue
+
+        ratios = result["phases"][name] = {}
+        for m in METRICS:
+            now, old = metrics.get(m), base.get(m)
+            if now is None or old is None or old < min_ms:
+                continue
+            ratios[m] = now / old
+            if ratios[m] > 1 + tolerance:
+                result["regressions"].append(name + "." + m)
+
+    return result
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_baseline(path, reports):
+    baseline = load_baseline(path)
+    baseline.update({report["scene"]:report for report in reports})
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m epg.bench", description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="+", help="module:SceneClass")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--size", default="640x480", help="WIDTHxHEIGHT")
+    parser.add_argument("--baseline", help="JSON file of reports to compare against")
+    parser.add_argument("--save", action="store_true", help="write the reports into --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--replay", help="recording to feed the scene (see Scene.record)")
+    parser.add_argument("--output", help="write the JSON result here instead of stdout")
+    args = parser.parse_args(argv)
+
+    init(tuple(int(i) for i in args.size.lower().split("x")))
+    reports = [run(get_scene_class(t), args.frames, args.warmup, replay=args.replay)
+               for t in args.targets]
+
+    regressed = False
+    if args.baseline and not args.save:
+        baseline = load_baseline(args.baseline)
+        for report in reports:
+            if base := baseline.get(report["scene"]):
+                report["comparison"] = c = compare(report, base, args.tolerance)
+                regressed = regressed or bool(c["regressions"])
+    elif args.baseline:
+        save_baseline(args.baseline, reports)
+
+    text = json.dumps(reports if len(reports) > 1 else reports[0], indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if regressed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+'''Memory-budgeted asset cache shared by image.get, font.load and mixer.get_sound'''
+import os
+import threading
+import contextlib
+from collections import OrderedDict
+import pygame as pg
+
+def get_size(obj):
+    '''Return an estimate of the memory used by an asset in bytes'''
+    if isinstance(obj, pg.Surface):
+        return obj.get_pitch() * obj.get_height()
+    if isinstance(obj, pg.mixer.Sound):
+        init = pg.mixer.get_init()
+        if init:
+            freq, format, channels = init
+            return int(obj.get_length() * freq) * channels * (abs(format) // 8)
+    if isinstance(obj, (list, tuple)):
+        return sum(map(get_size, obj))
+    return 1024
+
+class AssetCache:
+    '''Least recently used assets are evicted once their total size exceeds [budget]
+bytes. Pinned assets are never evicted. Assets loaded while a scene is the scope
+(see Scene.__init__ and App.switch) belong to it and are released with it.'''
+    def __init__(self, budget=256 << 20):
+        self.budget = budget
+        self.entries = OrderedDict() # key -> [value, size, owners or None]
+        self.pinned = {} # key -> count
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        self.scope = None
+        self.local = threading.local() # per-thread scope, see scoped()
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, load, *args, size=None, **kw):
+        '''Return the asset of [key], calling load(*args, **kw) on a miss'''
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                self.own(entry)
+                return entry[0]
+            self.misses += 1
+        value = load(*args, **kw) # outside the lock, loaders may run in parallel
+        return self.put(key, value, size)
+
+    def put(self, key, value, size=None):
+        with self.lock:
+            if key in self.entries:
+                self.remove(key)
+            scope = self.get_scope()
+            entry = [value, get_size(value) if size is None else size,
+                     None if scope is None else {scope}]
+            self.entries[key] = entry
+            self.size += entry[1]
+            self.evict()
+            return value
+
+    def own(self, entry):
+        scope = self.get_scope()
+        if scope is not None and entry[2] is not None: # global assets stay global
+            entry[2].add(scope)
+
+    def get_scope(self):
+        scope = getattr(self.local, "scope", None)
+        return self.scope if scope is None else scope
+
+    def remove(self, key):
+        with self.lock:
+            entry = self.entries.pop(key)
+            self.size -= entry[1]
+            return entry[0]
+
+    def evict(self, budget=None):
+        '''Drop least recently used unpinned assets until the size fits [budget]'''
+        if budget is None: budget = self.budget
+        with self.lock:
+            for key in tuple(self.entries):
+                if self.size <= budget:
+                    break
+                if key not in self.pinned:
+                    self.remove(key)
+                    self.evictions += 1
+
+    def pin(self, key):
+        with self.lock:
+            self.pinned[key] = self.pinned.get(key, 0) + 1
+
+    def unpin(self, key):
+        with self.lock:
+            count = self.pinned.get(key, 0) - 1
+            if count > 0:
+                self.pinned[key] = count
+            else:
+                self.pinned.pop(key, None)
+                self.evict()
+
+    def set_scope(self, scope):
+        '''Set what owns the assets loaded from now on (a scene, None for global)'''
+        old, self.scope = self.scope, None if scope is None else id(scope)
+        return old
+
+    @contextlib.contextmanager
+    def scoped(self, scope):
+        '''Make [scope] own the assets loaded by this thread in the with block'''
+        old, self.local.scope = getattr(self.local, "scope", None), id(scope)
+        try:
+            yield
+        finally:
+            self.local.scope = old
+
+    def transfer(self, old, new):
+        '''Give the assets owned by [old] to [new]'''
+        old, new = id(old), id(new)
+        with self.lock:
+            for entry in self.entries.values():
+                if entry[2] is not None and old in entry[2]:
+                    entry[2].discard(old)
+                    entry[2].add(new)
+
+    def release(self, scope):
+        '''Drop the unpinned assets owned only by [scope]'''
+        scope = id(scope)
+        with self.lock:
+            for key, entry in tuple(self.entries.items()):
+                owners = entry[2]
+                if owners is not None and scope in owners:
+                    owners.discard(scope)
+                    if not owners and key not in self.pinned:
+                        self.remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        return {"count":len(self.entries), "size":self.size, "budget":self.budget,
+                "hits":self.hits, "misses":self.misses, "evictions":self.evictions,
+                "pinned":len(self.pinned)}
+
+default = AssetCache()
+
+def get(key, load, *args, **kw):
+    return default.get(key, load, *args, **kw)
+
+def set_budget(budget):
+    default.budget = budget
+    default.evict()
+
+def get_file_size(path, default=1024):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return default
@@ -0,0 +1,74 @@
+import epg
+from weakref import WeakKeyDictionary
+
+class Camera(epg.action.ActionObject):
+    '''World-to-screen offset and zoom of a scene.
+[pos] is the world position of the screen's topleft. Actions act on the camera's rect,
+which is added to pos, e.g. camera.act(Shake(...)) shakes the whole screen.'''
+    def __init__(self, size, pos=(0, 0), zoom=1, *actions, end_func=None):
+        self.size = tuple(size)
+        self.pos = epg.Vector2(pos)
+        self.zoom = zoom
+        self.image = epg.Surface((0, 0))
+        self.rect = epg.Rect((0, 0), self.size)
+        self.orig_image, self.orig_rect = None, None
+        self.scaled = WeakKeyDictionary() # image -> (zoom, scaled image)
+        epg.action.ActionObject.__init__(self, actions, end_func)
+
+    @property
+    def offset(self):
+        return self.pos.x + self.rect.x, self.pos.y + self.rect.y
+
+    def get_state(self):
+        return self.offset, self.zoom
+
+    def get_viewport(self):
+        '''Return the visible area in world coordinates'''
+        x, y = self.offset
+        return epg.Rect(int(x), int(y), -(-self.size[0] // self.zoom) + 1,
+                        -(-self.size[1] // self.zoom) + 1)
+
+    def look_at(self, pos):
+        '''Center the view on the world position [pos]'''
+        self.pos.update(pos[0] - self.size[0] / self.zoom / 2,
+                        pos[1] - self.size[1] / self.zoom / 2)
+
+    def move(self, x, y):
+        self.pos.x += x
+        self.pos.y += y
+
+    def set_zoom(self, zoom):
+        self.zoom = zoom
+        self.scaled = WeakKeyDictionary()
+
+    def shake(self, duration=300, dist=(10, 0), **kw):
+        self.act(epg.action.Shake(duration, dist=dist, **kw))
+
+    def to_screen(self, rect):
+        x, y = self.offset
+        z = self.zoom
+        if z == 1:
+            return epg.Rect(rect[0] - round(x), rect[1] - round(y), rect[2], rect[3])
+        return epg.Rect(round((rect[0] - x) * z), round((rect[1] - y) * z),
+                        round(rect[2] * z), round(rect[3] * z))
+
+    def to_world(self, pos):
+        x, y = self.offset
+        return pos[0] / self.zoom + x, pos[1] / self.zoom + y
+
+    def scale(self, image):
+        try:
+            zoom, surf = self.scaled[image]
+            if zoom == self.zoom:
+                return surf
+        except KeyError:
+            pass
+        surf = epg.transform.scale_by(image, self.zoom)
+        self.scaled[image] = self.zoom, surf
+        return surf
+
+    def project(self, image, rect):
+        '''Return (image, screen rect) to draw [image] at the world [rect]'''
+        if self.zoom == 1:
+            return image, self.to_screen(rect)
+        return self.scale(image), self.to_screen(rect)
@@ -11,3 +11,37 @@ def collidepoint(rect, point, mask=None, **maskkw):
 		return mask.get_at((point[0] - rect[0], point[1] - rect[1]))
 	except IndexError:
 		return False
+
+def get_candidates(rect, group):
+	'''Broad phase: sprites of [group] that may collide with [rect]'''
+	if isinstance(group, epg.spatial.IndexedGroup):
+		return group.query_rect(rect)
+	return group.sprites()
+
+def collide_rect(sprite1, sprite2):
+	return sprite1.rect.colliderect(sprite2.rect)
+
+def spritecollide(sprite, group, dokill=False, collided=None):
+	'''Like pygame.sprite.spritecollide, using the spatial index of [group] if any'''
+	collided = collided or collide_rect
+	found = [s for s in get_candidates(sprite.rect, group) if collided(sprite, s)]
+	if dokill:
+		for s in found:
+			s.kill()
+	return found
+
+def spritecollideany(sprite, group, collided=None):
+	collided = collided or collide_rect
+	for s in get_candidates(sprite.rect, group):
+		if collided(sprite, s):
+			return s
+
+def groupcollide(group1, group2, dokill1=False, dokill2=False, collided=None):
+	'''Like pygame.sprite.groupcollide, using the spatial index of [group2] if any'''
+	crashed = {}
+	for s in group1.sprites():
+		if found := spritecollide(s, group2, dokill2, collided):
+			crashed[s] = found
+			if dokill1:
+				s.kill()
+	return crashed
@@ -0,0 +1,84 @@
+import pygame as pg
+import epg
+
+restricted = False # whether set_allowed() has been narrowed by a dispatcher
+
+def coalesce(events, types=(pg.MOUSEMOTION,)):
+    '''Merge runs of consecutive events of [types] into one event.
+MOUSEMOTION keeps the latest pos/buttons and sums rel, other types keep the latest event.'''
+    merged = []
+    for event in events:
+        if merged and event.type in types and merged[-1].type == event.type:
+            last = merged[-1]
+            if event.type == pg.MOUSEMOTION:
+                d = last.dict.copy()
+                d.update(event.dict)
+                d["rel"] = (last.rel[0] + event.rel[0], last.rel[1] + event.rel[1])
+                event = pg.event.Event(pg.MOUSEMOTION, d)
+            merged[-1] = event
+        else:
+            merged.append(event)
+    return merged
+
+class Dispatcher:
+    '''Send events only to the functions subscribed to their type
+(type None subscribes to all events)'''
+    def __init__(self, coalesce=(), exclusive=False, allowed=()):
+        self.subs = {}
+        self.coalesce = tuple(coalesce)
+        self.exclusive = exclusive
+        self.allowed = tuple(allowed)
+
+    @property
+    def active(self):
+        app = getattr(epg, "app", None)
+        return app is not None and getattr(app.scene, "dispatcher", None) is self
+
+    def subscribe(self, func, *types):
+        for type in types:
+            self.subs[type] = self.subs.get(type, ()) + (func,)
+        if self.exclusive and self.active:
+            self.activate()
+        return func
+
+    def unsubscribe(self, func, *types):
+        '''Unsubscribe [func] from [types] (all types if not given)'''
+        for type in (types or tuple(self.subs)):
+            funcs = tuple(f for f in self.subs.get(type, ()) if f != func)
+            if funcs:
+                self.subs[type] = funcs
+            else:
+                self.subs.pop(type, None)
+        if self.exclusive and self.active:
+            self.activate()
+
+    def dispatch(self, event):
+        for func in self.subs.get(event.type, ()):
+            func(event)
+        for func in self.subs.get(None, ()):
+            func(event)
+
+    def filter(self, events):
+        if self.coalesce:
+            return coalesce(events, self.coalesce)
+        return events
+
+    def set_exclusive(self, exclusive=True, allowed=None):
+        '''Only let subscribed types (plus QUIT and [allowed]) into the event queue'''
+        self.exclusive = exclusive
+        if allowed is not None:
+            self.allowed = tuple(allowed)
+        if self.active:
+            self.activate()
+
+    def activate(self):
+        '''Apply the event filter of this dispatcher to the event queue'''
+        global restricted
+
+        if self.exclusive and None not in self.subs:
+            pg.event.set_blocked(None)
+            pg.event.set_allowed([pg.QUIT, *self.subs, *self.allowed])
+            restricted = True
+        elif restricted:
+            pg.event.set_allowed(None)
+            restricted = False
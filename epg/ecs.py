@@ -0,0 +1,238 @@
+'''Archetype entity storage with NumPy columns (requires numpy)
+
+    world = World()
+    world.spawn_many(50000, pos=positions, vel=velocities)
+    world.add_system(move, "pos", "vel")
+    world.update()
+'''
+import numpy as np
+import epg
+
+COMPONENTS = { # name: (dtype, shape of one value)
+    "pos":(np.float32, (2,)),
+    "vel":(np.float32, (2,)),
+    "frame":(np.int32, ()),
+    "start":(np.float64, ()),
+    "flags":(np.uint32, ()),
+}
+
+class Archetype:
+    '''Entities having exactly the same set of components, one array per component'''
+    def __init__(self, specs, capacity=64):
+        self.components = frozenset(specs)
+        self.specs = specs
+        self.count = 0
+        self.ids = np.zeros(capacity, np.int64)
+        self.columns = {name:np.zeros((capacity,) + shape, dtype)
+                        for name, (dtype, shape) in specs.items()}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        '''Return a view of the live rows of a column'''
+        return self.columns[name][:self.count]
+
+    @property
+    def capacity(self):
+        return len(self.ids)
+
+    def reserve(self, n):
+        if self.count + n <= self.capacity:
+            return
+        capacity = max(self.capacity * 2, self.count + n)
+        self.ids = np.resize(self.ids, capacity)
+        for name, column in self.columns.items():
+            new = np.zeros((capacity,) + column.shape[1:], column.dtype)
+            new[:self.count] = column[:self.count]
+            self.columns[name] = new
+
+    def add(self, ids, values):
+        '''Append rows for [ids], return the first row'''
+        n = len(ids)
+        self.reserve(n)
+        row = self.count
+        self.ids[row:row + n] = ids
+        for name, column in self.columns.items():
+            column[row:row + n] = values.get(name, 0)
+        self.count += n
+        return row
+
+    def remove(self, row):
+        '''Swap-remove [row], return the id of the entity moved into it (or None)'''
+        self.count -= 1
+        last = self.count
+        if row == last:
+            return None
+        self.ids[row] = self.ids[last]
+        for column in self.columns.values():
+            column[row] = column[last]
+        return int(self.ids[row])
+
+class World:
+    '''Entities stored by archetype, updated by vectorized systems'''
+    def __init__(self, **components):
+        self.specs = dict(COMPONENTS)
+        self.specs.update(components)
+        self.archetypes = {}
+        self.locations = {} # id -> (archetype, row)
+        self.systems = []
+        self.next_id = 0
+        self.last_time = None
+        self.version = 0 # bumped on every change, see WorldSprite
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, id):
+        return id in self.locations
+
+    def get_archetype(self, components):
+        key = frozenset(components)
+        arch = self.archetypes.get(key)
+        if arch is None:
+            try:
+                specs = {name:self.specs[name] for name in sorted(key)}
+            except KeyError as e:
+                epg.throw("unknown component", e)
+            arch = self.archetypes[key] = Archetype(specs)
+        return arch
+
+    def spawn(self, **values):
+        return int(self.spawn_many(1, **values)[0])
+
+    def spawn_many(self, n, **values):
+        '''Create [n] entities with the components in [values] (scalars or arrays of n)'''
+        arch = self.get_archetype(values)
+        ids = np.arange(self.next_id, self.next_id + n)
+        self.next_id += n
+        self.version += 1
+        row = arch.add(ids, values)
+        for i, id in enumerate(ids.tolist()):
+            self.locations[id] = arch, row + i
+        return ids
+
+    def despawn(self, id):
+        arch, row = self.locations.pop(id)
+        self.version += 1
+        moved = arch.remove(row)
+        if moved is not None:
+            self.locations[moved] = arch, row
+
+    def despawn_where(self, arch, mask):
+        '''Remove the entities of [arch] where the boolean [mask] is set'''
+        for id in arch.ids[:arch.count][mask].tolist():
+            self.despawn(id)
+
+    def get(self, id, name):
+        arch, row = self.locations[id]
+        return arch.columns[name][row]
+
+    def set(self, id, name, value):
+        arch, row = self.locations[id]
+        arch.columns[name][row] = value
+        self.version += 1
+
+    def touch(self):
+        '''Record a change made by writing to the columns directly'''
+        self.version += 1
+
+    def query(self, *components):
+        '''Yield the non-empty archetypes having all [components]'''
+        need = set(components)
+        for arch in tuple(self.archetypes.values()):
+            if arch.count and need <= arch.components:
+                yield arch
+
+    def add_system(self, func, *components):
+        '''Call func(dt, *columns) per archetype having [components] on update()'''
+        self.systems.append((func, components))
+        return func
+
+    def del_system(self, func):
+        self.systems = [s for s in self.systems if s[0] != func]
+
+    def update(self, dt=None):
+        '''Run all systems, [dt] (ms) defaults to the game time since the last update'''
+        if dt is None:
+            now = epg.get_time()
+            dt = 0 if self.last_time is None else now - self.last_time
+            self.last_time = now
+        if self.systems:
+            self.version += 1
+        for func, components in self.systems:
+            for arch in self.query(*components):
+                func(dt, *(arch[c] for c in components))
+
+def move(dt, pos, vel):
+    '''pos += vel (pixels per second) * dt'''
+    pos += vel * (dt / 1000)
+
+def animate(interval, length):
+    '''Return a system setting "frame" from the game time and each entity's "start"'''
+    def animate(dt, frame, start):
+        frame[:] = ((epg.get_time() - start) // interval) % length
+    return animate
+
+class WorldSprite(epg.sprite.Sprite):
+    '''Draws the entities of a World that have "pos" and "frame" as frames[frame]
+at pos, in one blit call, so the world can be put into a Scene group.
+Its rect covers the entities (or is the fixed [bounds]) and it is marked dirty
+whenever the world changes, so it also repaints in a dirty Scene.'''
+    batch = False
+    autosleep = False # its own update only follows the world
+
+    def __init__(self, world, frames, groups=(), anchor="topleft", bounds=None):
+        super().__init__(*groups)
+        self.world = world
+        self.frames = list(frames)
+        self.anchor = anchor
+        self.bounds = bounds
+        self.version = None
+        self.dirty = 0
+        self.image = epg.Surface((0, 0))
+        self.rect = epg.Rect(bounds if bounds else (0, 0, 0, 0))
+
+    def update(self):
+        if self.world.version == self.version:
+            return
+        self.version = self.world.version
+        self.dirty = 1
+        if self.bounds:
+            return
+        w, h = self.frames[0].get_size()
+        rect = None
+        for arch in self.world.query("pos", "frame"):
+            pos = arch["pos"]
+            (x0, y0), (x1, y1) = pos.min(0), pos.max(0)
+            r = epg.Rect(int(x0) - 1, int(y0) - 1, int(x1 - x0) + w + 2, int(y1 - y0) + h + 2)
+            rect = r if rect is None else rect.union(r)
+        if rect is None:
+            rect = epg.Rect(0, 0, 0, 0)
+        elif self.anchor == "center":
+            rect.move_ip(-(w // 2), -(h // 2))
+        self.rect = rect
+
+    def get_blits(self, camera=None):
+        frames = self.frames
+        if camera is not None and camera.zoom != 1:
+            frames = [camera.scale(f) for f in frames]
+        w, h = frames[0].get_size()
+        seq = []
+        for arch in self.world.query("pos", "frame"):
+            pos = arch["pos"]
+            if self.anchor == "center":
+                pos = pos - (w / 2, h / 2)
+            if camera is not None:
+                view = camera.get_viewport()
+                mask = (pos[:, 0] > view.left - w) & (pos[:, 0] < view.right) & \
+                       (pos[:, 1] > view.top - h) & (pos[:, 1] < view.bottom)
+                pos = (pos[mask] - camera.offset) * camera.zoom
+                index = arch["frame"][mask]
+            else:
+                index = arch["frame"]
+            seq.extend(zip(map(frames.__getitem__, index.tolist()), pos.astype(np.int32).tolist()))
+        return seq
+
+    def draw(self, screen, camera=None, **kw):
+        epg.scene.blits(screen, self.get_blits(camera))
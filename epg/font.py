@@ -1,6 +1,5 @@
 import pygame as pg
 import epg
-from functools import lru_cache
 from pygame.font import *
 
 default_font = NotImplemented
@@ -8,8 +7,8 @@ def set_default(font, gpath=epg.get_asset):
     global default_font
     default_font = gpath(font) if gpath else font
 
-@lru_cache(10)
 def load(font=None, size=None, gpath=epg.get_asset):
+    '''Return a Font, cached by epg.cache'''
     if not font:
         font = default_font
     elif isinstance(font, str) and gpath:
@@ -20,7 +19,8 @@ def load(font=None, size=None, gpath=epg.get_asset):
             return font
         size = 20
     
-    return Font(font, size)
+    return epg.cache.get(("font", font, size), Font, font, size,
+                         size=epg.cache.get_file_size(font))
 
 def normal_render(text, size=20, color=(255, 255, 255), antialias=True, font=None, 
                 style=(), gpath=epg.get_asset, **kw):
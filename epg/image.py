@@ -1,11 +1,44 @@
+import os
 import pygame as pg
 import epg
-from functools import lru_cache, partial
+from functools import partial
+from weakref import WeakKeyDictionary
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pygame.image import *
 
-def load(name, gpath=epg.get_asset):
+def has_alpha(surf):
+    '''Return True if [surf] has per-pixel alpha with any non-opaque pixel'''
+    if not surf.get_flags() & pg.SRCALPHA:
+        return False
+    return pg.mask.from_surface(surf, 254).count() < surf.get_width() * surf.get_height()
+
+def convert_surface(surf, alpha=None, colorkey=None, rle=False):
+    '''Convert [surf] to the display format: convert_alpha() if it has an alpha
+channel (or [alpha] is True), else convert(). alpha="auto" uses convert() for fully
+opaque images too, which drops their alpha channel (actions like Rotate or Erase
+then fill with a color instead of transparency). [colorkey] makes a flat sprite
+with a transparent color instead, [rle] sets RLEACCEL. Unchanged if there is no display.'''
+    if pg.display.get_surface() is None:
+        return surf
+    flags = pg.RLEACCEL if rle else 0
+    if colorkey is not None:
+        surf = surf.convert()
+        surf.set_colorkey(colorkey, flags)
+    elif alpha == "auto" and has_alpha(surf) or \
+         alpha is None and surf.get_flags() & pg.SRCALPHA or alpha is True:
+        surf = surf.convert_alpha()
+        if rle: surf.set_alpha(255, flags)
+    else:
+        key = surf.get_colorkey()
+        surf = surf.convert()
+        if key is not None and rle: surf.set_colorkey(key, flags)
+    return surf
+
+def load(name, gpath=epg.get_asset, convert=True, **convertkw):
+    '''Load an image converted to the display format (see convert_surface)'''
     if gpath: name = gpath(name)
-    return pg.image.load(name)
+    surf = pg.image.load(name)
+    return convert_surface(surf, **convertkw) if convert else surf
 
 def loads(name, start=0, stop=None, step=1, load=load, **loadkw):
     if "{}" not in name:
@@ -22,9 +55,68 @@ def loads(name, start=0, stop=None, step=1, load=load, **loadkw):
         else:
             isload = True
 
-get = lru_cache(256)(load)
+def get_key(name, gpath=epg.get_asset, **kw):
+    '''Return the epg.cache key of get(name, gpath, **kw)'''
+    return "image", name, gpath, pg.display.get_surface() is not None, tuple(sorted(kw.items()))
+
+def get(name, gpath=epg.get_asset, **kw):
+    '''load() through epg.cache, keyed by the format arguments and whether there is a display'''
+    return epg.cache.get(get_key(name, gpath, **kw), load, name, gpath, **kw)
+
+def pin(name, gpath=epg.get_asset, **kw):
+    '''Load an image and keep it in the cache until unpin()'''
+    surf = get(name, gpath, **kw)
+    epg.cache.default.pin(get_key(name, gpath, **kw))
+    return surf
+
+def unpin(name, gpath=epg.get_asset, **kw):
+    epg.cache.default.unpin(get_key(name, gpath, **kw))
+
 gets = partial(loads, load=get)
 
+def list_frames(name, start=0, stop=None, step=1, gpath=epg.get_asset):
+    '''Return the names name.format(i) of the existing frame files, in order'''
+    if "{}" not in name:
+        return [name]
+    names = []
+    for i in epg.math.counter(start, stop, step):
+        path = name.format(i)
+        if not os.path.exists(gpath(path) if gpath else path):
+            break
+        names.append(path)
+    if not names:
+        raise FileNotFoundError("no frames found for %s"%name)
+    return names
+
+def decode(path):
+    '''Process pool worker: return (pixels, size, has alpha) of an image file'''
+    surf = pg.image.load(path)
+    alpha = bool(surf.get_flags() & pg.SRCALPHA)
+    return pg.image.tobytes(surf, "RGBA" if alpha else "RGB"), surf.get_size(), alpha
+
+def loads_parallel(name, start=0, stop=None, step=1, load=load, workers=None,
+                   executor=None, **loadkw):
+    '''Like loads(), but list the frames first and decode them on a thread pool
+(or the given [executor]), returning the surfaces in order. With a
+ProcessPoolExecutor the pixels are decoded in other processes and converted here,
+without going through [load].'''
+    gpath = loadkw.pop("gpath", epg.get_asset)
+    names = list_frames(name, start, stop, step, gpath)
+    if isinstance(executor, ProcessPoolExecutor):
+        convert = loadkw.pop("convert", True)
+        paths = [gpath(n) if gpath else n for n in names]
+        surfs = [pg.image.frombytes(data, size, "RGBA" if alpha else "RGB")
+                 for data, size, alpha in executor.map(decode, paths)]
+        return [convert_surface(surf, **loadkw) for surf in surfs] if convert else surfs
+
+    func = partial(load, gpath=gpath, **loadkw)
+    if executor is not None:
+        return list(executor.map(func, names))
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(func, names))
+
+gets_parallel = partial(loads_parallel, load=get)
+
 def load_sheet(name, x=None, y=None, tile=None, id=0, load=load, **loadkw):
     return SpriteSheet(load(name, **loadkw), x, y, tile, id)
 
@@ -35,8 +127,35 @@ def load_static_animation(name, load=load, **loadkw):
         return StaticAnimation(name)
     return name
 
+def get_frames(obj):
+    '''Return the frames of a Surface, Animation, SpriteSheet or iterable as a list'''
+    if isinstance(obj, epg.Surface):
+        return [obj]
+    elif isinstance(obj, StaticAnimation):
+        return [obj.image]
+    elif isinstance(obj, Animation):
+        obj = obj.sheet
+    if isinstance(obj, SpriteSheet):
+        return [obj.get_frame(i) for i in range(len(obj))]
+    return list(obj)
+
+registry = WeakKeyDictionary() # source surface -> {(tile, x, y): frames}
+
+def get_shared_frames(surf, tile, x, y):
+    '''Return the list of copied frames (None until sliced) shared by the sheets
+of [surf] with the same tiles'''
+    sheets = registry.setdefault(surf, {})
+    key = tuple(tile), x, y
+    frames = sheets.get(key)
+    if frames is None:
+        frames = sheets[key] = [None] * (x * y)
+    return frames
+
 class SpriteSheet:
-    def __init__(self, surf, x=None, y=None, tile=None, id=0, cached=True):
+    '''Frames of [surf], sliced on first access. With [cached], sliced frames are
+kept and shared by all the sheets of the same surface and tiles; [copy] chooses
+converted copies or zero-copy subsurfaces.'''
+    def __init__(self, surf, x=None, y=None, tile=None, id=0, cached=True, copy=True):
         if x and y and (not tile):
             tile = (surf.get_width() // x, surf.get_height() // y)
         elif tile:
@@ -49,8 +168,13 @@ class SpriteSheet:
         self.orginal_image = surf
         self.tile = tile
         self.id = id
-        self.cached = None # Important!
-        self.cached = [self.update() for i in range(len(self))] if cached else None
+        self.copy = copy
+        if not cached:
+            self.cached = None
+        elif copy:
+            self.cached = get_shared_frames(surf, tile, x, y)
+        else: # subsurfaces keep their parent alive, so they can not be in the weak registry
+            self.cached = [None] * len(self)
 
     def __iter__(self):
         for y in range(self.y):
@@ -64,15 +188,23 @@ class SpriteSheet:
         return self.x * self.y
 
     def get_surface(self, *pos):
-        if self.cached:
-            return self.cached[self.id]
-        else:
-            if not pos:
-                pos = self.get_pos_by_id(self.id)
-            return self.orginal_image.subsurface(
-                (pos[0]*self.tile[0], pos[1]*self.tile[1],
-                 self.tile[0], self.tile[1])
-                ).convert_alpha()
+        return self.get_frame(pos[1] * self.x + pos[0] if pos else self.id)
+
+    def get_frame(self, id):
+        if self.cached is None:
+            return self.slice(id)
+        surf = self.cached[id]
+        if surf is None:
+            surf = self.cached[id] = self.slice(id)
+        return surf
+
+    def slice(self, id):
+        pos = self.get_pos_by_id(id)
+        surf = self.orginal_image.subsurface(
+            (pos[0]*self.tile[0], pos[1]*self.tile[1], self.tile[0], self.tile[1]))
+        if not self.copy:
+            return surf
+        return surf.convert_alpha() if pg.display.get_surface() is not None else surf.copy()
 
     def get_pos_by_id(self, id):
         return id % self.x, id // self.x
@@ -92,6 +224,8 @@ class FileSheet(SpriteSheet):
     def __init__(self, surfs, id=0):
         self.cached = tuple(surfs)
         self.id = id
+        self.x, self.y = len(self.cached), 1
+        self.copy = False
         try:
             self.tile = self.cached[0].get_size()
         except IndexError:
@@ -132,6 +266,12 @@ class Animation:
             self.last_update = now
             return self.next_image()
 
+    def skip(self, elapsed):
+        '''Advance by the frames shown in [elapsed] ms, e.g. after sleeping'''
+        if self.interval > 0:
+            self.id = (self.id + int(elapsed // self.interval)) % len(self.sheet)
+            self.last_update = epg.get_time() - elapsed % self.interval
+
 class StaticAnimation(Animation):
     def __init__(self, surf):
         self.image = surf
@@ -152,3 +292,71 @@ class StaticAnimation(Animation):
     def update(self, reset=False):
         if reset:
             return self.image
+
+    def skip(self, elapsed):
+        pass
+
+class Timeline:
+    '''Frames shared by many sprites, the frame at a time is (now - start) // interval'''
+    def __init__(self, sheet, interval=100, loop=True, cls=SpriteSheet, **sheetkw):
+        if isinstance(sheet, epg.Surface) and sheetkw:
+            sheet = cls(sheet, **sheetkw)
+        self.frames = get_frames(sheet)
+        self.interval = interval
+        self.loop = loop
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get_index(self, elapsed):
+        i = int(elapsed // self.interval) if self.interval else 0
+        if self.loop:
+            return i % len(self.frames)
+        return max(0, min(i, len(self.frames) - 1))
+
+    def get_surface(self, start=0, now=None):
+        if now is None: now = epg.get_time()
+        return self.frames[self.get_index(now - start)]
+
+    def animation(self, start=None, offset=0):
+        '''Return an Animation of this timeline for one sprite, [offset] ms ahead'''
+        return TimedAnimation(self, start, offset)
+
+class TimedAnimation(Animation):
+    '''Animation reading a shared Timeline, its only state is the start time'''
+    def __init__(self, timeline, start=None, offset=0):
+        self.timeline = timeline
+        self.start = (epg.get_time() if start is None else start) - offset
+        self.index = None
+
+    @property
+    def id(self):
+        return self.timeline.get_index(epg.get_time() - self.start)
+    @id.setter
+    def id(self, value):
+        self.start = epg.get_time() - value * self.timeline.interval
+
+    def get_surface(self):
+        return self.timeline.frames[self.id]
+
+    def next_image(self):
+        return self.get_surface()
+
+    def skip(self, elapsed):
+        pass
+
+    def update(self, reset=False):
+        i = self.id
+        if reset or i != self.index:
+            self.index = i
+            return self.timeline.frames[i]
+
+def update_timed(sprites, now=None):
+    '''Set the image of many sprites from their TimedAnimation, reading the clock once'''
+    if now is None: now = epg.get_time()
+    for sprite in sprites:
+        a = sprite.animation
+        i = a.timeline.get_index(now - a.start)
+        if i != a.index:
+            a.index = i
+            sprite.image = a.timeline.frames[i]
@@ -0,0 +1,90 @@
+import heapq
+import epg
+from time import perf_counter
+from types import GeneratorType
+
+class Job:
+    '''A generator (one step per next()) or a callable (one step per call).
+Without an interval a callable runs once, with one it repeats until it returns True.'''
+    def __init__(self, job, priority=0, interval=None, name=None):
+        self.gen = job if isinstance(job, GeneratorType) else None
+        self.func = None if self.gen else job
+        self.priority = priority
+        self.interval = interval
+        self.name = name
+        self.next_time = None
+        self.seq = 0
+        self.done = False
+
+    def __repr__(self):
+        return "<Job %r priority=%s%s>"%(self.name or self.gen or self.func, self.priority,
+            " done" if self.done else "")
+
+    def __lt__(self, value):
+        return (-self.priority, self.seq) < (-value.priority, value.seq)
+
+    def run(self):
+        '''Run one step, return True when the job is finished'''
+        if self.gen:
+            try:
+                next(self.gen)
+            except StopIteration:
+                self.done = True
+        else:
+            self.done = bool(self.func()) or not self.interval
+        return self.done
+
+    def cancel(self):
+        self.done = True
+        if self.gen:
+            self.gen.close()
+
+class JobQueue:
+    '''Run small steps of queued jobs each frame until [budget] ms is used up.
+Higher priorities run first, jobs of the same priority take turns.'''
+    def __init__(self, budget=2):
+        self.budget = budget
+        self.jobs = []
+        self.seq = 0
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def __iter__(self):
+        return iter(self.jobs)
+
+    def add(self, job, priority=0, interval=None, name=None):
+        if not isinstance(job, Job):
+            job = Job(job, priority, interval, name)
+        self.jobs.append(job)
+        return job
+
+    def get(self, name):
+        for job in self.jobs:
+            if job.name == name:
+                return job
+        epg.throw("job %s does not exist"%name)
+
+    def cancel(self, name):
+        self.get(name).cancel()
+
+    def update(self):
+        deadline = perf_counter() + self.budget / 1000
+        now = epg.get_time()
+
+        self.jobs = [job for job in self.jobs if not job.done]
+        ready = [job for job in self.jobs if job.next_time is None or now >= job.next_time]
+        heapq.heapify(ready)
+
+        while ready:
+            job = heapq.heappop(ready)
+            self.seq += 1
+            job.seq = self.seq
+            if not job.run():
+                if job.interval:
+                    job.next_time = now + job.interval
+                else:
+                    heapq.heappush(ready, job)
+
+            if perf_counter() >= deadline:
+                break
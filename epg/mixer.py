@@ -39,7 +39,11 @@ def play_music(name, *args, gpath=epg.get_asset, **kw):
         music.load(name)
         music.play(*args, **kw)
         
+def get_sound(name, gpath=epg.get_asset):
+    '''Return a Sound, cached by epg.cache'''
+    if gpath: name = gpath(name)
+    return epg.cache.get(("sound", name), Sound, name)
+
 def play_sound(name, *args, gpath=epg.get_asset, **kw):
     if sound_on:
-        if gpath: name = gpath(name)
-        Sound(name).play(*args, **kw)
+        get_sound(name, gpath).play(*args, **kw)
@@ -0,0 +1,142 @@
+'''Vectorized particle emitters (requires numpy)
+
+    emitter = Emitter(spark_animation, groups=(scene.group_fx,), lifetime=600)
+    emitter.emit(200, pos=(320, 240))
+'''
+import math
+import numpy as np
+import epg
+
+class Emitter(epg.sprite.Sprite):
+    '''Particles kept in NumPy arrays and drawn in one blit call.
+The frame of a particle follows its age through the frames of [animation], and its
+alpha fades out over its lifetime in [alpha_levels] steps (cached surfaces).'''
+    batch = False
+
+    def __init__(self, animation, groups=(), pos=(0, 0), capacity=1024, lifetime=(500, 1000),
+                 speed=(50, 150), angle=(0, 360), gravity=(0, 0), rate=0, fade=True,
+                 alpha_levels=16, once=False, seed=None):
+        super().__init__(*groups)
+        self.frames = epg.image.get_frames(animation)
+        self.pos = tuple(pos)
+        self.lifetime, self.speed, self.angle = lifetime, speed, angle
+        self.gravity = np.array(gravity, np.float32)
+        self.rate = rate # particles per second
+        self.fade = fade
+        self.alpha_levels = alpha_levels
+        self.once = once
+        self.random = np.random.default_rng(seed)
+
+        self.count = 0
+        self.p = np.zeros((capacity, 2), np.float32)
+        self.v = np.zeros((capacity, 2), np.float32)
+        self.age = np.zeros(capacity, np.float32)
+        self.life = np.ones(capacity, np.float32)
+        self.cached = {} # (frame, alpha level) -> surface
+        self.pending = 0
+        self.last_update = epg.get_time()
+
+        self.size = self.frames[0].get_size()
+        self.image = epg.Surface((0, 0))
+        self.rect = epg.Rect(self.pos, (0, 0))
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, n):
+        capacity = len(self.age)
+        if self.count + n <= capacity:
+            return
+        capacity = max(capacity * 2, self.count + n)
+        for name in ("p", "v", "age", "life"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def uniform(self, value, n):
+        if isinstance(value, (int, float)):
+            return np.full(n, value, np.float32)
+        return self.random.uniform(value[0], value[1], n).astype(np.float32)
+
+    def emit(self, n, pos=None):
+        '''Spawn [n] particles at [pos] (the emitter's pos by default)'''
+        n = int(n)
+        if n <= 0:
+            return
+        self.reserve(n)
+        i, j = self.count, self.count + n
+        angle = np.radians(self.uniform(self.angle, n))
+        speed = self.uniform(self.speed, n)
+        self.p[i:j] = pos if pos is not None else self.pos
+        self.v[i:j, 0] = np.cos(angle) * speed
+        self.v[i:j, 1] = np.sin(angle) * speed
+        self.age[i:j] = 0
+        self.life[i:j] = self.uniform(self.lifetime, n)
+        self.count = j
+
+    def update(self):
+        now = epg.get_time()
+        dt, self.last_update = now - self.last_update, now
+        if self.rate:
+            self.pending += self.rate * dt / 1000
+            self.emit(math.floor(self.pending))
+            self.pending %= 1
+
+        n = self.count
+        if n:
+            age = self.age[:n]
+            age += dt
+            alive = age < self.life[:n]
+            if not alive.all():
+                n = self.count = int(alive.sum())
+                for a in (self.p, self.v, self.age, self.life):
+                    a[:n] = a[:len(alive)][alive]
+
+            p, v = self.p[:n], self.v[:n]
+            p += v * (dt / 1000)
+            v += self.gravity * (dt / 1000)
+
+        if n:
+            (x0, y0), (x1, y1) = p.min(0), p.max(0)
+            w, h = self.size
+            self.rect = epg.Rect(int(x0) - w, int(y0) - h, int(x1 - x0) + w * 2, int(y1 - y0) + h * 2)
+        else:
+            self.rect = epg.Rect(self.pos, (0, 0))
+            if self.once and not self.rate:
+                self.kill()
+
+    def get_surface(self, frame, level):
+        key = frame, level
+        surf = self.cached.get(key)
+        if surf is None:
+            surf = self.frames[frame]
+            if level < self.alpha_levels - 1:
+                surf = surf.copy()
+                surf.set_alpha(round(255 * level / (self.alpha_levels - 1)))
+            surf = self.cached[key] = surf
+        return surf
+
+    def get_blits(self, camera=None):
+        n = self.count
+        if not n:
+            return []
+        t = self.age[:n] / self.life[:n]
+        frame = np.minimum((t * len(self.frames)).astype(np.int32), len(self.frames) - 1)
+        if self.fade:
+            level = ((1 - t) * (self.alpha_levels - 1) + 0.5).astype(np.int32)
+        else:
+            level = np.full(n, self.alpha_levels - 1, np.int32)
+
+        w, h = self.size
+        pos = self.p[:n] - (w / 2, h / 2)
+        get_surface = self.get_surface
+        if camera is not None:
+            pos = (pos - camera.offset) * camera.zoom
+            if camera.zoom != 1:
+                get_surface = lambda f, l: camera.scale(self.get_surface(f, l))
+        return list(zip(map(get_surface, frame.tolist(), level.tolist()),
+                        pos.astype(np.int32).tolist()))
+
+    def draw(self, screen, camera=None, **kw):
+        epg.scene.blits(screen, self.get_blits(camera))
@@ -0,0 +1,95 @@
+import epg
+from concurrent.futures import ThreadPoolExecutor
+
+def get_task(asset):
+    '''"path" -> image.get(path), (func, *args) -> func(*args), func -> func()'''
+    if isinstance(asset, str):
+        return epg.image.get, (asset,)
+    elif isinstance(asset, tuple):
+        return asset[0], asset[1:]
+    elif callable(asset):
+        return asset, ()
+    epg.throw("invalid asset", repr(asset))
+
+class Preloader:
+    '''Warm the assets of a scene on a worker pool, then build the scene
+on the main thread. Call update() every frame (App.preload does it).'''
+    def __init__(self, scene, assets=None, name=None, switch=False, workers=None,
+                 executor=None, app=None, **scenekw):
+        self.factory = scene
+        self.name = name
+        self.switch = switch
+        self.scenekw = scenekw
+        self.app = app if app else epg.app
+        self.scene = scene if isinstance(scene, epg.Scene) else None
+        self.host = None
+        self.done = False
+
+        if assets is None:
+            assets = getattr(scene, "ASSETS", ())
+        self.own_executor = executor is None
+        self.executor = ThreadPoolExecutor(workers) if self.own_executor else executor
+        self.futures = [self.executor.submit(self.load, func, args)
+                        for func, args in map(get_task, assets)]
+
+    def load(self, func, args):
+        '''Worker: cached assets belong to the preloaded scene (the preloader until built)'''
+        with epg.cache.default.scoped(self.scene if self.scene is not None else self):
+            return func(*args)
+
+    @property
+    def loaded(self):
+        return sum(f.done() for f in self.futures)
+
+    @property
+    def total(self):
+        return len(self.futures)
+
+    @property
+    def progress(self):
+        '''0 to 1, building the scene counts as the last step'''
+        return (self.loaded + self.done) / (self.total + 1)
+
+    def futures_pending(self):
+        return any(not f.done() for f in self.futures)
+
+    def results(self):
+        '''Return the loaded assets in order (re-raise the first failure)'''
+        return [f.result() for f in self.futures]
+
+    def update(self):
+        if self.done or self.futures_pending():
+            return
+
+        self.results()
+        if self.own_executor:
+            self.executor.shutdown(wait=False)
+        if self.scene is None:
+            self.scene = self.factory(**self.scenekw)
+            epg.cache.default.transfer(self, self.scene)
+        self.detach()
+        self.done = True
+
+        if self.name is not None:
+            self.app.cache(self.scene, self.name)
+        if self.switch:
+            self.app.switch(self.scene)
+
+    def cancel(self):
+        for f in self.futures:
+            f.cancel()
+        if self.own_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if not self.done:
+            epg.cache.default.release(self.scene if self.scene is not None else self)
+        self.detach()
+
+    def attach(self, scene):
+        '''Poll update() from the funcs of [scene]'''
+        self.host = scene
+        scene.add_func(self.update, self)
+
+    def detach(self):
+        if self.host is not None and self in self.host.funcs:
+            self.host.del_func(self)
+        self.host = None
@@ -0,0 +1,90 @@
+import time
+from array import array
+
+PHASES = ("funcs", "update", "draw", "events", "app", "tick", "flip")
+
+class RingBuffer:
+    '''Fixed-size buffer of the latest float samples'''
+    def __init__(self, size=600):
+        self.data = array("d", bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.data[self.index] = value
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def clear(self):
+        self.index = self.count = 0
+
+    def values(self):
+        '''Return the samples from the oldest to the latest'''
+        if self.count < self.size:
+            return self.data[:self.count].tolist()
+        return (self.data[self.index:] + self.data[:self.index]).tolist()
+
+    def last(self):
+        if self.count:
+            return self.data[self.index - 1]
+
+    def mean(self):
+        if self.count:
+            return sum(self.data[:self.count]) / self.count
+
+    def percentile(self, p):
+        '''Return the [p]th percentile (nearest rank) of the samples'''
+        if not self.count:
+            return None
+        values = sorted(self.data[:self.count])
+        rank = max(0, min(self.count - 1, int(-(-p * self.count // 100)) - 1))
+        return values[rank]
+
+class Profiler:
+    '''Per-phase frame timings (ms) kept in ring buffers'''
+    def __init__(self, size=600, phases=PHASES, timer=time.perf_counter):
+        self.size = size
+        self.timer = timer
+        self.phases = tuple(phases)
+        self.buffers = {name:RingBuffer(size) for name in self.phases + ("frame",)}
+        self.begin = self.last_lap = None
+
+    def __getitem__(self, phase):
+        return self.buffers[phase]
+
+    def start(self):
+        self.begin = self.last_lap = self.timer()
+
+    def lap(self, phase):
+        '''Record the time since the previous lap as [phase]'''
+        now = self.timer()
+        self.buffers[phase].append((now - self.last_lap) * 1000)
+        self.last_lap = now
+
+    def end(self):
+        '''Record the time since start() as the whole frame'''
+        self.buffers["frame"].append((self.timer() - self.begin) * 1000)
+
+    def clear(self):
+        for buffer in self.buffers.values():
+            buffer.clear()
+
+    def get(self, phase):
+        return self.buffers[phase].values()
+
+    def percentile(self, phase, p):
+        return self.buffers[phase].percentile(p)
+
+    def stats(self, percentiles=(50, 95, 99)):
+        '''Return {phase: {"mean", "pXX"..., "count"}} for every phase'''
+        stats = {}
+        for name, buffer in self.buffers.items():
+            d = stats[name] = {"count":len(buffer), "mean":buffer.mean()}
+            for p in percentiles:
+                d["p%d"%p] = buffer.percentile(p)
+        return stats
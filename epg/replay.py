@@ -0,0 +1,102 @@
+import pickle
+import struct
+import pygame as pg
+import epg
+
+MAGIC = b"EPGR\x01"
+FRAME = struct.Struct("<dI") # game time (ms), number of events
+EVENT = struct.Struct("<IH") # event type, payload size
+
+def dumps(d):
+    '''Pickle an event dict, dropping values that cannot be pickled'''
+    if not d:
+        return b""
+    try:
+        return pickle.dumps(d, pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        d = {k:v for k, v in d.items() if _picklable(v)}
+        return pickle.dumps(d, pickle.HIGHEST_PROTOCOL)
+
+def _picklable(value):
+    try:
+        pickle.dumps(value)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+    return True
+
+class Recorder:
+    '''Write the game time and events of every frame to a binary file'''
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.time = 0
+        self.frames = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def begin(self, time):
+        self.time = time
+
+    def write(self, events):
+        self.file.write(FRAME.pack(self.time, len(events)))
+        for event in events:
+            payload = dumps(event.dict)
+            self.file.write(EVENT.pack(event.type, len(payload)))
+            self.file.write(payload)
+        self.frames += 1
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def load(path):
+    '''Return [(time, events)] of every frame in a recording'''
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        epg.throw("not a recording:", path)
+
+    frames = []
+    pos = len(MAGIC)
+    while pos < len(data):
+        time, n = FRAME.unpack_from(data, pos)
+        pos += FRAME.size
+        events = []
+        for _ in range(n):
+            type, size = EVENT.unpack_from(data, pos)
+            pos += EVENT.size
+            d = pickle.loads(data[pos:pos + size]) if size else {}
+            pos += size
+            events.append(pg.event.Event(type, d))
+        frames.append((time, events))
+    return frames
+
+class Replayer:
+    '''Feed recorded frames back: begin() sets the clock, events holds the frame's events'''
+    def __init__(self, path):
+        self.frames = load(path)
+        self.index = 0
+        self.events = []
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def finished(self):
+        return self.index >= len(self.frames)
+
+    def begin(self, clock):
+        '''Set [clock] to the time of the next frame, return False at the end'''
+        if self.finished:
+            self.events = []
+            return False
+        time, self.events = self.frames[self.index]
+        self.index += 1
+        clock.set_time(time)
+        return True
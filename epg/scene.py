@@ -1,7 +1,30 @@
 import epg
+from time import perf_counter
+
+def merge_rects(rects, bounds=None):
+    '''Union overlapping rects (clipped to [bounds]) into a list of regions'''
+    merged = []
+    for rect in rects:
+        if bounds: rect = rect.clip(bounds)
+        if not (rect.w and rect.h):
+            continue
+
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect = rect.union(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+def blits(surf, seq):
+    '''Blit a sequence of (image, dest) in one call'''
+    if hasattr(surf, "fblits"):
+        surf.fblits(seq)
+    else:
+        surf.blits(seq, False)
 
 class Scene(epg.Rect):
-    def __init__(self, screen=None, init=True):
+    def __init__(self, screen=None, init=True, dirty=False, batch=False):
         self.screen = screen if screen else epg.app.screen
         super().__init__(self.screen.get_rect())
 
@@ -9,9 +32,45 @@ class Scene(epg.Rect):
         self.music_manager = None
         self.funcs = {}
         self.groups = {}
+        self.layers = {}
+        self.batch = batch
+        self.camera = None
+        self.camera_state = None
+        self.jobs = None
+
+        self.dirty = dirty
+        self.background = (0, 0, 0)
+        self.last_rects = None
+        self.dirty_rects = []
+        self.update_rects = None
+        self.profiler = None
+        self.dispatcher = epg.dispatch.Dispatcher(coalesce=(epg.MOUSEMOTION,))
+        self.game_clock = None
+        self.timestep = None
+        self.recorder = self.replayer = None
+        self.live_clock = None
+        self.sleeping = {} # sprite -> (time fell asleep, by auto sleep)
+        self.auto_sleep = None
+        self.sleep_check = 0
+        self.initializing = False
 
         if init:
+            self.run_init()
+
+    def run_init(self):
+        '''Call init() with the scene's clock as the current one (see set_clock),
+so the sprites and actions created there read the scene's time, and the scene
+owning the assets loaded there (see epg.cache)'''
+        current = epg.timer.current
+        epg.timer.current = self.game_clock or epg.timer.default
+        scope = epg.cache.default.set_scope(self)
+        self.initializing = True
+        try:
             self.init()
+        finally:
+            self.initializing = False
+            epg.timer.current = current
+            epg.cache.default.scope = scope
 
     def __eq__(self, value):
         return self is value
@@ -22,30 +81,70 @@ class Scene(epg.Rect):
             self.single_run()
             
     def single_run(self):
-        for sendarg, func in self.funcs.values():
+        profiler = self.profiler
+        if profiler: profiler.start()
+        epg.timer.current = clock = self.game_clock or epg.timer.default
+        if self.replayer:
+            if not self.replayer.begin(clock):
+                self.replayer = None
+                self.onreplayend()
+                return
+        elif self.recorder:
+            clock.set_time((self.live_clock or epg.timer.default).get_time())
+            self.recorder.begin(clock.get_time())
+
+        for sendarg, func in tuple(self.funcs.values()):
             if sendarg:
                 func(self)
             else:
                 func()
+        if profiler: profiler.lap("funcs")
         
-        self.update()
+        if self.camera is not None:
+            self.camera.update()
+        if self.timestep:
+            self.fixed_update(clock)
+        else:
+            self.update()
+        if profiler: profiler.lap("update")
         if not self.scene_running:
             return
 
+        moved = self.interpolate_rects() if self.timestep and self.interpolate else ()
         self._draw()
+        for rect, pos in moved:
+            rect.topleft = pos
+        if profiler: profiler.lap("draw")
         
-        now = epg.time.get_ticks()
-        events = epg.event.get()
-        epg.time_offset += epg.time.get_ticks() - now
+        events = self.get_events(clock)
 
-        for event in events:
+        dispatch = self.dispatcher.dispatch
+        for event in self.dispatcher.filter(events):
             if event.type == epg.QUIT:
                 self.onexit()
             else:
+                dispatch(event)
                 self.events(event)
+        if profiler: profiler.lap("events")
 
         epg.app.update()
-        epg.update_display()
+        if profiler: profiler.lap("app")
+        epg.update_display(self.update_rects, profiler)
+        if profiler: profiler.end()
+
+    def get_events(self, clock):
+        if self.replayer:
+            epg.event.pump()
+            return self.replayer.events
+
+        now = perf_counter()
+        events = epg.event.get()
+        if self.recorder:
+            clock = self.live_clock or epg.timer.default
+        clock.skip((perf_counter() - now) * 1000)
+        if self.recorder:
+            self.recorder.write(events)
+        return events
 
     def add_func(self, func, name=None, sendarg=False):
         if not name: name = func
@@ -57,15 +156,83 @@ class Scene(epg.Rect):
     def del_func(self, name):
         del self.funcs[name]
         
-    def add_group(self, *names, pref="group_", asattr=True):
+    def set_jobs(self, budget=2):
+        '''Run queued jobs every frame for at most [budget] ms'''
+        if self.jobs:
+            self.jobs.budget = budget
+        else:
+            self.jobs = epg.jobs.JobQueue(budget)
+            self.add_func(self.jobs.update, "jobs")
+        return self.jobs
+
+    def unset_jobs(self):
+        self.del_func("jobs")
+        self.jobs = None
+
+    def add_job(self, job, priority=0, interval=None, name=None):
+        if not self.jobs:
+            self.set_jobs()
+        return self.jobs.add(job, priority, interval, name)
+
+    def get_job(self, name):
+        return self.jobs.get(name)
+
+    def del_job(self, name):
+        self.jobs.cancel(name)
+
+    def add_group(self, *names, pref="group_", asattr=True, layer=None, index=None, cls=None,
+                  bounds=None):
+        '''[index]: "hash", "quadtree" or a factory of epg.spatial indexes,
+[bounds]: the world rect of a quadtree (the screen by default, grown as needed),
+[cls]: the group class (e.g. epg.sprite.TimelineGroup)'''
         keys = tuple(self.groups)
         for name in names:
             if name in keys:
                 epg.throw("group %s already exists"%name)
-            self.groups[name] = g = epg.sprite.Group()
+            if cls:
+                g = cls()
+            elif index:
+                g = epg.spatial.IndexedGroup(epg.spatial.get_index(
+                    index() if callable(index) else index,
+                    epg.Rect(bounds if bounds else self)))
+            else:
+                g = epg.sprite.Group()
+            self.groups[name] = g
             if asattr: setattr(self, pref + str(name), g)
+            if layer is not None: self.layers[name] = layer
         return g
 
+    def set_layer(self, name, layer):
+        '''Draw the group [name] at [layer] (lower layers first)'''
+        self.layers[name] = layer
+
+    def change_layer(self, sprite, layer):
+        '''Draw [sprite] at [layer] whatever its groups'''
+        sprite._layer = layer
+
+    def get_layers(self, viewport=None):
+        '''Return the sprites of all groups as lists per layer, in drawing order.
+With [viewport], only sprites whose rect collides with it (found through the
+spatial index of indexed groups)'''
+        layers = {}
+        for name, group in self.groups.items():
+            default = self.layers.get(name, 0)
+            if viewport is None:
+                sprites = group
+            elif isinstance(group, epg.spatial.IndexedGroup):
+                sprites = group.ordered(group.query_rect(viewport))
+            else:
+                sprites = group.sprites()
+                sprites = [sprites[i] for i in viewport.collidelistall([s.rect for s in sprites])]
+
+            for sprite in sprites:
+                layer = sprite.__dict__.get("_layer", default)
+                try:
+                    layers[layer].append(sprite)
+                except KeyError:
+                    layers[layer] = [sprite]
+        return [layers[k] for k in sorted(layers)]
+
     def get_group(self, name):
         return self.groups[name]
     
@@ -76,19 +243,173 @@ class Scene(epg.Rect):
             except KeyError:
                 epg.throw("group %s does not exist"%name)
             if asattr: delattr(self, pref + str(name), g)
+            self.layers.pop(name, None)
 
     def do_group(self, func):
         for group in self.groups.values():
             func(self, group)
     
+    def get_viewport(self):
+        return self.camera.get_viewport() if self.camera is not None else None
+
     def draw_group(self, **kw):
-        for group in self.groups.values():
-            for sprite in group:
+        for sprites in self.get_layers(self.get_viewport()):
+            self.draw_sprites(sprites, **kw)
+
+    def draw_sprites(self, sprites, **kw):
+        '''Draw [sprites] in order, batching them into one blit call if self.batch
+or through the camera. Sprites with batch = False are still drawn by sprite.draw()
+(with camera=self.camera if there is one)'''
+        camera = self.camera
+        if not self.batch and camera is None:
+            for sprite in sprites:
                 sprite.draw(self.screen, **kw)
+            return
+
+        seq = []
+        for sprite in sprites:
+            if getattr(sprite, "batch", True):
+                if camera is None:
+                    seq.append((sprite.image, sprite.rect))
+                else:
+                    seq.append(camera.project(sprite.image, sprite.rect))
+            else:
+                if seq:
+                    blits(self.screen, seq)
+                    seq = []
+                if camera is None:
+                    sprite.draw(self.screen, **kw)
+                else:
+                    sprite.draw(self.screen, camera=camera, **kw)
+        if seq:
+            blits(self.screen, seq)
                 
+    def draw_dirty(self):
+        '''Clear and redraw only the regions changed since the last frame'''
+        camera = self.camera
+        layers = self.get_layers(self.get_viewport())
+        sprites = [sprite for layer in layers for sprite in layer]
+        if camera is None:
+            rects = {sprite:(sprite.image, sprite.rect.copy()) for sprite in sprites}
+        else:
+            state, self.camera_state = self.camera_state, camera.get_state()
+            if state != self.camera_state:
+                self.redraw()
+            rects = {sprite:(sprite.image, camera.to_screen(sprite.rect)) for sprite in sprites}
+        last, self.last_rects = self.last_rects, rects
+
+        if last is None:
+            self.clear()
+            for layer in layers:
+                self.draw_sprites(layer)
+            self.dirty_rects.clear()
+            self.update_rects = None
+            return
+
+        dirty = self.dirty_rects
+        for sprite, (image, rect) in rects.items():
+            old = last.pop(sprite, None)
+            if old is None:
+                dirty.append(rect)
+            elif old[0] is not image or old[1] != rect or getattr(sprite, "dirty", 0):
+                dirty.append(old[1])
+                dirty.append(rect)
+            if getattr(sprite, "dirty", 0) == 1: # as pygame's DirtySprite, 2 stays dirty
+                sprite.dirty = 0
+        dirty.extend(rect for _, rect in last.values())
+        for sprite in sprites: # regions changed inside custom drawers, e.g. TileMap
+            changed = getattr(sprite, "dirty_rects", None)
+            if changed:
+                dirty.extend(changed if camera is None else map(camera.to_screen, changed))
+
+        srects = [rects[sprite][1] for sprite in sprites]
+        self.update_rects = merge_rects(dirty, self.screen.get_rect())
+        for rect in self.update_rects:
+            self.screen.set_clip(rect)
+            self.clear(rect)
+            self.draw_sprites([sprites[i] for i in rect.collidelistall(srects)])
+        self.screen.set_clip(None)
+        self.dirty_rects = []
+
+    def add_dirty(self, *rects):
+        '''Mark regions to be redrawn in the next dirty frame'''
+        self.dirty_rects.extend(epg.Rect(rect) for rect in rects)
+
+    def redraw(self):
+        '''Repaint the whole screen in the next dirty frame'''
+        self.last_rects = None
+
+    def clear(self, rect=None):
+        if isinstance(self.background, epg.Surface):
+            self.screen.blit(self.background, rect or (0, 0), rect)
+        else:
+            self.screen.fill(self.background, rect)
+
     def update_group(self):
+        '''Update the groups, skipping sleeping sprites'''
+        if self.sleeping or self.auto_sleep:
+            self.check_sleeping()
+        sleeping = self.sleeping
         for group in self.groups.values():
-            group.update()
+            if not sleeping or sleeping.keys().isdisjoint(group.spritedict.keys()):
+                group.update()
+                continue
+            sprites = [sprite for sprite in group.sprites() if sprite not in sleeping]
+            if hasattr(group, "update_sprites"):
+                group.update_sprites(sprites)
+            else:
+                for sprite in sprites:
+                    sprite.update()
+
+    def sleep(self, sprite, auto=False):
+        '''Stop updating [sprite] (it is still drawn) until wake(sprite)'''
+        if sprite not in self.sleeping:
+            self.sleeping[sprite] = self.get_time(), auto
+
+    def wake(self, sprite):
+        '''Update [sprite] again, calling sprite.wake(elapsed ms) if it has one'''
+        start, auto = self.sleeping.pop(sprite, (None, None))
+        if start is not None and hasattr(sprite, "wake"):
+            sprite.wake(self.get_time() - start)
+
+    def set_auto_sleep(self, margin=64, interval=250):
+        '''Put to sleep the sprites farther than [margin] from the view (camera or
+screen) and wake them when they come back, checked every [interval] ms.
+Sprites with autosleep = False are left awake.'''
+        self.auto_sleep = margin, interval
+        self.sleep_check = 0
+
+    def unset_auto_sleep(self):
+        self.auto_sleep = None
+        for sprite, (start, auto) in tuple(self.sleeping.items()):
+            if auto:
+                self.wake(sprite)
+
+    def check_sleeping(self):
+        now = self.get_time()
+        if now < self.sleep_check:
+            return
+        margin, interval = self.auto_sleep if self.auto_sleep else (None, 250)
+        self.sleep_check = now + interval
+
+        for sprite in tuple(self.sleeping):
+            if not sprite.alive():
+                del self.sleeping[sprite]
+        if margin is None:
+            return
+
+        view = (self.get_viewport() or epg.Rect(self)).inflate(margin * 2, margin * 2)
+        sleeping = self.sleeping
+        for group in self.groups.values():
+            for sprite in group.sprites():
+                rect = sprite.rect
+                if rect is None or not getattr(sprite, "autosleep", True):
+                    continue
+                if view.colliderect(rect):
+                    if sprite in sleeping and sleeping[sprite][1]:
+                        self.wake(sprite)
+                elif sprite not in sleeping:
+                    self.sleep(sprite, True)
 
     def set_music(self, *paths, **kw):
         self.music_manager = epg.MusicManager(paths, **kw)
@@ -97,6 +418,135 @@ class Scene(epg.Rect):
     def unset_music(self):
         self.del_func("music_manager")
 
+    def set_coalesce(self, *types):
+        '''Merge bursts of consecutive events of [types] (MOUSEMOTION by default)
+into one per frame, see epg.dispatch.coalesce'''
+        self.dispatcher.coalesce = types if types else (epg.MOUSEMOTION,)
+
+    def unset_coalesce(self):
+        self.dispatcher.coalesce = ()
+
+    def subscribe(self, func, *types):
+        '''Call func(event) for every event of [types]'''
+        return self.dispatcher.subscribe(func, *types)
+
+    def unsubscribe(self, func, *types):
+        self.dispatcher.unsubscribe(func, *types)
+
+    def set_clock(self, clock=None, **kw):
+        '''Give the scene its own GameClock (driven by the default one)'''
+        if clock is None:
+            kw.setdefault("source", epg.timer.default)
+            clock = epg.timer.GameClock(**kw)
+        self.game_clock = clock
+        if self.initializing or self.scene_running:
+            epg.timer.current = clock
+        return clock
+
+    def unset_clock(self):
+        self.game_clock = None
+        if self.initializing or self.scene_running:
+            epg.timer.current = epg.timer.default
+
+    def get_time(self):
+        return (self.game_clock or epg.timer.default).get_time()
+
+    def set_camera(self, camera=None, **kw):
+        '''Draw the groups through a Camera (world-to-screen offset and zoom)'''
+        self.camera = camera if camera is not None else epg.camera.Camera(self.size, **kw)
+        self.redraw()
+        return self.camera
+
+    def unset_camera(self):
+        self.camera = None
+        self.redraw()
+
+    def set_timestep(self, step=1000 / 30, interpolate=True, max_steps=5):
+        '''Run update() in fixed [step]s (ms) of the scene clock, several per frame
+if needed, and draw sprites interpolated between the last two steps'''
+        self.timestep = step
+        self.interpolate = interpolate
+        self.max_steps = max_steps
+        self.accumulator = self.alpha = 0
+        self.last_time = self.get_time()
+        self.sim_clock = epg.timer.GameClock(manual=True)
+        self.sim_clock.set_time(self.last_time)
+        self.last_positions = {}
+
+    def unset_timestep(self):
+        self.timestep = None
+
+    def fixed_update(self, clock):
+        now = clock.get_time()
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        epg.timer.current = self.sim_clock
+        steps = 0
+        while self.accumulator >= self.timestep and self.scene_running:
+            if steps == self.max_steps: # drop the backlog instead of spiralling
+                self.accumulator %= self.timestep
+                break
+            if self.interpolate:
+                self.last_positions = {sprite:sprite.rect.topleft
+                    for group in self.groups.values() for sprite in group}
+
+            self.sim_clock.step(self.timestep)
+            self.update()
+            self.accumulator -= self.timestep
+            steps += 1
+        epg.timer.current = clock
+        self.alpha = self.accumulator / self.timestep
+
+    def interpolate_rects(self):
+        '''Move sprites between their last two positions, return [(rect, pos)] to restore'''
+        moved = []
+        alpha = self.alpha
+        for sprite, (x, y) in self.last_positions.items():
+            rect = sprite.rect
+            pos = rect.topleft
+            if pos != (x, y) and getattr(sprite, "interpolate", True) and sprite.alive():
+                moved.append((rect, pos))
+                rect.topleft = (round(x + (pos[0] - x) * alpha), round(y + (pos[1] - y) * alpha))
+        return moved
+
+    def record(self, path):
+        '''Record the events and game time of every frame to [path].
+Like on replay, the scene clock is frozen at the frame's start time during a frame.'''
+        self.stop_recording()
+        self.recorder = epg.replay.Recorder(path)
+        self.live_clock = self.game_clock
+        self.set_clock(manual=True)
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+            if self.live_clock is None:
+                self.unset_clock()
+            else:
+                self.set_clock(self.live_clock)
+                self.live_clock = None
+
+    def replay(self, path):
+        '''Replay a recording instead of reading the event queue,
+with the scene clock following the recorded game time'''
+        self.replayer = epg.replay.Replayer(path)
+        self.set_clock(manual=True)
+        return self.replayer
+
+    def onreplayend(self):
+        self.quit()
+
+    def set_profiler(self, size=600, **kw):
+        '''Time every phase of single_run, keeping the last [size] frames'''
+        self.profiler = epg.profiler.Profiler(size, **kw)
+        return self.profiler
+
+    def unset_profiler(self):
+        self.profiler = None
+
     def switch(self, scene, cache=None):
         if cache:
             epg.app.cache(self, cache)
@@ -110,13 +560,18 @@ class Scene(epg.Rect):
         
     def quit(self):
         self.scene_running = False
+        if self.recorder:
+            self.recorder.flush()
 
     def _draw(self):
         self.draw()
 
     def draw(self):
-        self.screen.fill((0, 0, 0))
-        self.draw_group()
+        if self.dirty:
+            self.draw_dirty()
+        else:
+            self.clear()
+            self.draw_group()
     
     def update(self):
         self.update_group()
@@ -125,8 +580,9 @@ class Scene(epg.Rect):
         pass
 
 class AScene(Scene, epg.action.ActionObject):
-    def __init__(self, screen=None, bgcolor=(0, 0, 0), end_func=None, init=True):
-        Scene.__init__(self, screen, init=False)
+    def __init__(self, screen=None, bgcolor=(0, 0, 0), end_func=None, init=True, dirty=False,
+                 batch=False):
+        Scene.__init__(self, screen, init=False, dirty=dirty, batch=batch)
         epg.action.ActionObject.__init__(self, None, end_func)
         self.real_screen = self.screen
         self.screen = self.screen.copy()
@@ -134,7 +590,7 @@ class AScene(Scene, epg.action.ActionObject):
         self.orig_image, self.orig_rect = None, None
         self.image, self.rect = self.screen, self.screen.get_rect()
         if init:
-            self.init()
+            self.run_init()
 
     def kill(self):
         self.quit()
@@ -145,9 +601,19 @@ class AScene(Scene, epg.action.ActionObject):
         Scene.single_run(self)
 
     def _draw(self):
-        self.real_screen.fill(self.bgcolor)
+        if self.dirty and self.manager:
+            self.redraw()
         self.draw()
-        self.real_screen.blit(self.screen, self.rect)
+
+        if self.update_rects is None:
+            self.real_screen.fill(self.bgcolor)
+            self.real_screen.blit(self.screen, self.rect)
+        else:
+            rects = [rect.move(self.rect.topleft) for rect in self.update_rects]
+            for rect, area in zip(rects, self.update_rects):
+                self.real_screen.fill(self.bgcolor, rect)
+                self.real_screen.blit(self.screen, rect, area)
+            self.update_rects = rects
 
     def update(self):
         epg.action.ActionObject.update(self)
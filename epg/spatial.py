@@ -0,0 +1,267 @@
+import epg
+from pygame.sprite import Group
+
+class BaseIndex:
+    '''Spatial index of sprites by their rects.
+Call refresh() after sprites move (IndexedGroup.update() does it).'''
+    def __init__(self):
+        self.items = {} # sprite -> (rect copy, cell keys or node)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, sprite):
+        return sprite in self.items
+
+    def insert(self, sprite):
+        raise NotImplementedError
+
+    def remove(self, sprite):
+        raise NotImplementedError
+
+    def query_rect(self, rect):
+        raise NotImplementedError
+
+    def move(self, sprite):
+        self.remove(sprite)
+        self.insert(sprite)
+
+    def refresh(self, sprites=None):
+        '''Re-index [sprites] (all indexed ones by default) whose rect has changed'''
+        items = self.items
+        for sprite in (tuple(items) if sprites is None else sprites):
+            rect = sprite.rect
+            item = items.get(sprite)
+            if item is None:
+                if rect is not None: self.insert(sprite)
+            elif item[0] != rect:
+                self.move(sprite)
+
+    def clear(self):
+        self.items.clear()
+
+    def query_point(self, pos):
+        return [s for s in self.query_rect((pos[0], pos[1], 1, 1))
+                if s.rect.collidepoint(pos)]
+
+    def query_radius(self, center, radius):
+        x, y = center
+        r2 = radius * radius
+        found = []
+        for s in self.query_rect((x - radius, y - radius, radius * 2 + 1, radius * 2 + 1)):
+            rect = s.rect
+            dx = x - max(rect.left, min(x, rect.right - 1))
+            dy = y - max(rect.top, min(y, rect.bottom - 1))
+            if dx * dx + dy * dy <= r2:
+                found.append(s)
+        return found
+
+class SpatialHash(BaseIndex):
+    '''Uniform grid of [cell] sized buckets'''
+    def __init__(self, cell=64):
+        super().__init__()
+        self.cell = cell
+        self.cells = {} # (x, y) -> {sprite:None}
+
+    def get_keys(self, rect):
+        c = self.cell
+        x0, y0 = rect[0] // c, rect[1] // c
+        x1 = (rect[0] + max(rect[2], 1) - 1) // c
+        y1 = (rect[1] + max(rect[3], 1) - 1) // c
+        return tuple((x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+
+    def insert(self, sprite):
+        rect = sprite.rect.copy()
+        keys = self.get_keys(rect)
+        self.items[sprite] = rect, keys
+        for key in keys:
+            try:
+                self.cells[key][sprite] = None
+            except KeyError:
+                self.cells[key] = {sprite:None}
+
+    def remove(self, sprite):
+        _, keys = self.items.pop(sprite)
+        for key in keys:
+            cell = self.cells[key]
+            del cell[sprite]
+            if not cell: del self.cells[key]
+
+    def move(self, sprite):
+        rect, keys = self.items[sprite]
+        new_keys = self.get_keys(sprite.rect)
+        if new_keys == keys:
+            self.items[sprite] = sprite.rect.copy(), keys
+        else:
+            self.remove(sprite)
+            self.insert(sprite)
+
+    def clear(self):
+        super().clear()
+        self.cells.clear()
+
+    def query_rect(self, rect):
+        rect = epg.Rect(rect)
+        found = {}
+        cells = self.cells
+        for key in self.get_keys(rect):
+            cell = cells.get(key)
+            if cell:
+                found.update(cell)
+        return [s for s in found if rect.colliderect(s.rect)]
+
+class _Node:
+    __slots__ = ("rect", "items", "children", "depth")
+
+    def __init__(self, rect, depth):
+        self.rect = rect
+        self.items = {}
+        self.children = None
+        self.depth = depth
+
+class QuadTree(BaseIndex):
+    '''Quadtree over [bounds] for uneven distributions. The root grows to take
+sprites outside the bounds; sprites across child borders stay in the upper nodes.'''
+    def __init__(self, bounds, capacity=8, max_depth=8):
+        super().__init__()
+        self.capacity = capacity
+        self.max_depth = max_depth
+        self.root = _Node(epg.Rect(bounds), 0)
+
+    def insert(self, sprite):
+        rect = sprite.rect.copy()
+        if not self.root.rect.contains(rect):
+            self.grow(rect)
+        self._insert(self.root, sprite, rect)
+
+    def grow(self, rect):
+        '''Double the root towards [rect] until it contains it, the old root
+becoming one of the quadrants (depths can go negative, leaves keep their size)'''
+        root = self.root
+        while not root.rect.contains(rect):
+            x, y, w, h = root.rect
+            w, h = max(w, 1), max(h, 1)
+            left = x - w if rect.left < x else x
+            top = y - h if rect.top < y else y
+            new = _Node(epg.Rect(left, top, w * 2, h * 2), root.depth - 1)
+            new.children = [root if r == (x, y, w, h) else _Node(epg.Rect(r), root.depth)
+                            for r in ((left, top, w, h), (left + w, top, w, h),
+                                      (left, top + h, w, h), (left + w, top + h, w, h))]
+            root = new
+        self.root = root
+
+    def _insert(self, node, sprite, rect):
+        while node.children:
+            for child in node.children:
+                if child.rect.contains(rect):
+                    node = child
+                    break
+            else:
+                break
+
+        node.items[sprite] = rect
+        self.items[sprite] = rect, node
+        if node.children is None and len(node.items) > self.capacity and \
+           node.depth < self.max_depth:
+            self.split(node)
+
+    def split(self, node):
+        x, y, w, h = node.rect
+        hw, hh = w // 2, h // 2
+        if not (hw and hh):
+            return
+        node.children = [_Node(epg.Rect(r), node.depth + 1) for r in (
+            (x, y, hw, hh), (x + hw, y, w - hw, hh),
+            (x, y + hh, hw, h - hh), (x + hw, y + hh, w - hw, h - hh))]
+
+        items, node.items = node.items, {}
+        for sprite, rect in items.items():
+            self._insert(node, sprite, rect)
+
+    def remove(self, sprite):
+        _, node = self.items.pop(sprite)
+        del node.items[sprite]
+
+    def clear(self):
+        super().clear()
+        self.root = _Node(self.root.rect, 0)
+
+    def query_rect(self, rect):
+        rect = epg.Rect(rect)
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            found.extend(s for s in node.items if rect.colliderect(s.rect))
+            if node.children:
+                stack.extend(c for c in node.children if rect.colliderect(c.rect))
+        return found
+
+class IndexedGroup(Group):
+    '''Group that keeps its sprites in a spatial [index]'''
+    def __init__(self, index=None, *sprites):
+        self.index = index if index is not None else SpatialHash()
+        self.pending = []
+        self.order = {} # sprite -> insertion counter, the group's iteration order
+        self.counter = 0
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, *args):
+        super().add_internal(sprite, *args)
+        self.pending.append(sprite)
+        self.order[sprite] = self.counter
+        self.counter += 1
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.order.pop(sprite, None)
+        if sprite in self.index:
+            self.index.remove(sprite)
+
+    def update(self, *args, **kw):
+        super().update(*args, **kw)
+        self.refresh()
+
+    def update_sprites(self, sprites):
+        '''Update only [sprites] (e.g. the awake ones), then refresh'''
+        for sprite in sprites:
+            sprite.update()
+        self.refresh()
+
+    def refresh(self):
+        '''Index new sprites and re-index moved ones'''
+        self.flush()
+        self.index.refresh()
+
+    def flush(self):
+        '''Index the sprites added since the last refresh (once they have a rect)'''
+        if self.pending:
+            pending = [s for s in self.pending if self.has_internal(s)]
+            self.pending = [s for s in pending if s.rect is None]
+            self.index.refresh([s for s in pending if s.rect is not None])
+
+    def query_rect(self, rect):
+        self.flush()
+        return self.index.query_rect(rect)
+
+    def ordered(self, sprites):
+        '''Sort [sprites] (e.g. query results) in the group's order'''
+        return sorted(sprites, key=self.order.__getitem__)
+
+    def query_point(self, pos):
+        self.flush()
+        return self.index.query_point(pos)
+
+    def query_radius(self, center, radius):
+        self.flush()
+        return self.index.query_radius(center, radius)
+
+def get_index(index, bounds=None):
+    '''"hash" -> SpatialHash(), "quadtree" -> QuadTree(bounds), an index is returned as is'''
+    if index == "hash":
+        return SpatialHash()
+    elif index == "quadtree":
+        return QuadTree(bounds)
+    elif isinstance(index, BaseIndex):
+        return index
+    epg.throw("invalid index", repr(index))
@@ -3,12 +3,23 @@ import epg
 from pygame.sprite import *
 
 class Static(Sprite):
+    pool = None
+
     def __init__(self, surf, groups=(), anchor="center", **rectkw):
         super().__init__(groups)
         self.image = surf
         self.rect = self.image.get_rect(**rectkw)
         self.anchor = anchor
 
+    def reset(self, *args, **kw):
+        '''Reinitialize a reused sprite with the arguments of __init__'''
+        type(self).__init__(self, *args, **kw)
+
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.put(self)
+
 class AStatic(Static, epg.action.ActionObject):
     def __init__(self, surf, *actions, end_func=None, **statickw):
         Static.__init__(self, surf, **statickw)
@@ -16,12 +27,14 @@ class AStatic(Static, epg.action.ActionObject):
         
         epg.action.ActionObject.__init__(self, actions, end_func)
         AStatic.update(self)
-    
+
     def update(self):
         Static.update(self)
         epg.action.ActionObject.update(self)
 
 class BaseDynamic(Sprite):
+    pool = None
+
     def __init__(self, types, groups=(), state=None, total=None,
                  anchor="center", call_after_kill=None, **rectkw):
         super().__init__(*groups)
@@ -61,6 +74,19 @@ class BaseDynamic(Sprite):
 
             return True
         
+    def wake(self, elapsed):
+        '''Catch up the animation after sleeping for [elapsed] ms (see Scene.sleep)'''
+        self.animation.skip(elapsed)
+        self.state_changed = True
+
+    def reset(self, *args, **kw):
+        self.__class__.__init__(self, *args, **kw)
+
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.put(self)
+
     def update_state(self, state):
         if state != self.state:
             self.types[state].id = 0
@@ -83,6 +109,48 @@ class ADynamic(BaseDynamic, epg.action.ActionObject):
         BaseDynamic.update(self)
         epg.action.ActionObject.update(self)
         
+class TimelineGroup(Group):
+    '''Group of sprites animated by TimedAnimations, updated in one pass.
+update() only sets the images, sprite.update() is not called.'''
+    def update(self, *args, **kw):
+        epg.image.update_timed(self)
+
+    def update_sprites(self, sprites):
+        epg.image.update_timed(sprites)
+
+class Pool:
+    '''Reuse killed sprites of [cls] instead of creating new ones:
+pool.get(*args, **kw) takes the arguments of cls and reinitializes a free sprite
+with sprite.reset(), keeping its action manager when given the same actions.'''
+    def __init__(self, cls=Static, maxsize=None):
+        self.cls = cls
+        self.maxsize = maxsize
+        self.free = []
+
+    def __len__(self):
+        return len(self.free)
+
+    def get(self, *args, **kw):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.pooled = False
+            sprite.reset(*args, **kw)
+        else:
+            sprite = self.cls(*args, **kw)
+            sprite.pool = self
+            sprite.pooled = False
+        return sprite
+
+    def put(self, sprite):
+        if not sprite.pooled and (self.maxsize is None or len(self.free) < self.maxsize):
+            sprite.pooled = True
+            self.free.append(sprite)
+
+    def clear(self):
+        for sprite in self.free:
+            sprite.pool = None
+        self.free.clear()
+
 def OsDynamic(animation, *args, **kw):
     return Dynamic({"":animation}, *args, **kw)
 
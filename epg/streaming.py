@@ -0,0 +1,124 @@
+import os
+import warnings
+import epg
+from concurrent.futures import ThreadPoolExecutor
+
+def save_chunk(path, tiles=(), sprites=()):
+    '''Write a chunk file: [tiles] row by row, [sprites] as (group name, image name, rectkw)'''
+    epg.data.dump({"tiles":list(tiles), "sprites":list(sprites)}, path)
+
+class ChunkStreamer:
+    '''Load and unload the map chunks around the camera of [scene].
+Chunk files ([path].format(x=cx, y=cy), see save_chunk) are read and their images
+decoded on worker threads, then added to the tilemap and scene groups by a job of
+the scene's job queue, so only a frame budget is spent on them per frame.'''
+    def __init__(self, scene, path, tilemap=None, chunk_size=None, radius=1, keep=1,
+                 workers=1, priority=0, sprite_cls=None, per_step=16, gpath=epg.get_asset):
+        self.scene = scene
+        self.path = path
+        self.tilemap = tilemap
+        if tilemap is not None:
+            chunk_size = tilemap.chunk * tilemap.tile[0], tilemap.chunk * tilemap.tile[1]
+        elif chunk_size is None:
+            epg.throw("miss required argument(s): tilemap or chunk_size")
+        self.chunk_size = tuple(chunk_size)
+        self.radius, self.keep = radius, keep
+        self.priority = priority
+        self.sprite_cls = sprite_cls if sprite_cls else epg.sprite.Static
+        self.per_step = per_step
+        self.gpath = gpath
+
+        self.loaded = {} # (cx, cy) -> sprites
+        self.loading = {} # (cx, cy) -> Future
+        self.missing = set()
+        self.executor = ThreadPoolExecutor(workers)
+        scene.add_func(self.update, self)
+
+    def get_chunk_range(self, margin):
+        viewport = self.scene.get_viewport() or epg.Rect(self.scene)
+        w, h = self.chunk_size
+        return (viewport.left // w - margin, viewport.top // h - margin,
+                (viewport.right - 1) // w + margin, (viewport.bottom - 1) // h + margin)
+
+    def update(self):
+        x0, y0, x1, y1 = self.get_chunk_range(self.radius)
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                key = cx, cy
+                if key not in self.loaded and key not in self.loading and self.exists(key):
+                    self.loading[key] = self.executor.submit(self.read, key)
+
+        for key, future in tuple(self.loading.items()):
+            if future.done():
+                del self.loading[key]
+                try:
+                    data = future.result()
+                except Exception as e: # a broken chunk must not end the game
+                    warnings.warn("cannot load chunk %s: %r" % (self.get_file(key), e))
+                    self.missing.add(key)
+                    continue
+                self.loaded[key] = sprites = []
+                self.scene.add_job(self.integrate(key, data, sprites), self.priority)
+
+        x0, y0, x1, y1 = self.get_chunk_range(self.radius + self.keep)
+        for key in tuple(self.loaded):
+            if not (x0 <= key[0] <= x1 and y0 <= key[1] <= y1):
+                self.unload(key)
+
+    def get_file(self, key):
+        path = self.path.format(x=key[0], y=key[1])
+        return self.gpath(path) if self.gpath else path
+
+    def exists(self, key):
+        if key in self.missing:
+            return False
+        if self.tilemap is not None:
+            c = self.tilemap.chunk
+            if not (0 <= key[0] * c < self.tilemap.width and 0 <= key[1] * c < self.tilemap.height):
+                return False
+        if os.path.exists(self.get_file(key)):
+            return True
+        self.missing.add(key)
+        return False
+
+    def read(self, key):
+        '''Worker thread: load a chunk file, decode and convert its images'''
+        data = epg.data.load(self.get_file(key))
+        data["sprites"] = [(group, epg.image.get(name), rectkw)
+                           for group, name, rectkw in data.get("sprites", ())]
+        return data
+
+    def get_tile_rect(self, key):
+        tm = self.tilemap
+        c = tm.chunk
+        x, y = key[0] * c, key[1] * c
+        return x, y, min(c, tm.width - x), min(c, tm.height - y)
+
+    def integrate(self, key, data, sprites):
+        '''Job: add a loaded chunk to the scene, a few sprites per step'''
+        if self.loaded.get(key) is not sprites: # unloaded meanwhile
+            return
+        if self.tilemap is not None and data.get("tiles"):
+            self.tilemap.set_data(data["tiles"], self.get_tile_rect(key))
+            yield
+
+        for i, (group, surf, rectkw) in enumerate(data["sprites"]):
+            if self.loaded.get(key) is not sprites:
+                for s in sprites: s.kill()
+                return
+            sprites.append(self.sprite_cls(surf, (self.scene.groups[group],), **rectkw))
+            if i % self.per_step == self.per_step - 1:
+                yield
+
+    def unload(self, key):
+        for s in self.loaded.pop(key):
+            s.kill()
+        if self.tilemap is not None:
+            self.tilemap.fill(self.tilemap.empty, self.get_tile_rect(key))
+
+    def close(self):
+        if self in self.scene.funcs:
+            self.scene.del_func(self)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for key in tuple(self.loaded):
+            self.unload(key)
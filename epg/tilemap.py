@@ -0,0 +1,125 @@
+import epg
+from array import array
+
+class TileMap(epg.sprite.Sprite):
+    '''Tile layer over a SpriteSheet tileset. Tile ids live in a compact int array
+([empty] for no tile) and are pre-rendered into [chunk] x [chunk] tile surfaces,
+re-rendered only when their tiles change and drawn only when visible.
+The world rects of changed chunks are kept in [dirty_rects] for dirty Scenes.'''
+    batch = False
+
+    def __init__(self, tileset, size, data=None, groups=(), pos=(0, 0), chunk=16, empty=-1):
+        super().__init__(*groups)
+        self.frames = epg.image.get_frames(tileset)
+        self.tile = self.frames[0].get_size()
+        self.width, self.height = size
+        self.chunk = chunk
+        self.empty = empty
+        self.data = array("i", [empty]) * (self.width * self.height)
+        self.chunks = {} # (cx, cy) -> Surface or None if empty
+        self.dirty_rects = []
+        self.image = epg.Surface((0, 0))
+        self.rect = epg.Rect(pos, (self.width * self.tile[0], self.height * self.tile[1]))
+        if data is not None:
+            self.set_data(data)
+
+    def __getitem__(self, pos):
+        return self.data[pos[1] * self.width + pos[0]]
+
+    def __setitem__(self, pos, id):
+        self.set_tile(pos[0], pos[1], id)
+
+    def set_tile(self, x, y, id):
+        i = y * self.width + x
+        if self.data[i] != id:
+            self.data[i] = id
+            self.invalidate((x, y, 1, 1))
+
+    def set_data(self, data, rect=None):
+        '''Replace the tiles (row by row) of the whole map or of a tile [rect]'''
+        x0, y0, w, h = rect if rect else (0, 0, self.width, self.height)
+        data = array("i", data)
+        if len(data) != w * h:
+            epg.throw("expected", w * h, "tiles, got", len(data))
+        for row in range(h):
+            i = (y0 + row) * self.width + x0
+            self.data[i:i + w] = data[row * w:(row + 1) * w]
+        self.invalidate((x0, y0, w, h))
+
+    def fill(self, id, rect=None):
+        x0, y0, w, h = rect if rect else (0, 0, self.width, self.height)
+        self.set_data(array("i", [id]) * (w * h), (x0, y0, w, h))
+
+    def invalidate(self, rect=None):
+        '''Re-render the chunks covering a tile [rect] (all by default) when next drawn'''
+        if rect is None:
+            self.chunks.clear()
+            self.dirty_rects = [self.rect.copy()]
+            return
+        c = self.chunk
+        x0, y0, w, h = rect
+        for cy in range(y0 // c, (y0 + h - 1) // c + 1):
+            for cx in range(x0 // c, (x0 + w - 1) // c + 1):
+                self.chunks.pop((cx, cy), None)
+                self.dirty_rects.append(self.get_chunk_rect(cx, cy))
+
+    def tile_at(self, pos):
+        '''Return the tile coordinates at the world position [pos]'''
+        return (int(pos[0] - self.rect.x) // self.tile[0],
+                int(pos[1] - self.rect.y) // self.tile[1])
+
+    def get_chunk_rect(self, cx, cy):
+        tw, th = self.tile
+        c = self.chunk
+        w = min(c, self.width - cx * c)
+        h = min(c, self.height - cy * c)
+        return epg.Rect(self.rect.x + cx * c * tw, self.rect.y + cy * c * th, w * tw, h * th)
+
+    def render_chunk(self, cx, cy):
+        tw, th = self.tile
+        c, frames, empty = self.chunk, self.frames, self.empty
+        rect = self.get_chunk_rect(cx, cy)
+        seq = []
+        for y in range(rect.height // th):
+            i = (cy * c + y) * self.width + cx * c
+            for x, id in enumerate(self.data[i:i + rect.width // tw]):
+                if id != empty:
+                    seq.append((frames[id], (x * tw, y * th)))
+        if not seq:
+            return None
+
+        surf = epg.Surface(rect.size, epg.SRCALPHA)
+        if epg.display.get_surface():
+            surf = surf.convert_alpha()
+        surf.fill((0, 0, 0, 0))
+        epg.scene.blits(surf, seq)
+        return surf
+
+    def get_chunk(self, cx, cy):
+        try:
+            return self.chunks[cx, cy]
+        except KeyError:
+            surf = self.chunks[cx, cy] = self.render_chunk(cx, cy)
+            return surf
+
+    def get_visible_chunks(self, viewport):
+        '''Yield (surface, world rect) of the non-empty chunks colliding with [viewport]'''
+        area = self.rect.clip(viewport)
+        if not (area.w and area.h):
+            return
+        cw, ch = self.chunk * self.tile[0], self.chunk * self.tile[1]
+        x0, y0 = area.x - self.rect.x, area.y - self.rect.y
+        for cy in range(y0 // ch, (y0 + area.h - 1) // ch + 1):
+            for cx in range(x0 // cw, (x0 + area.w - 1) // cw + 1):
+                surf = self.get_chunk(cx, cy)
+                if surf is not None:
+                    yield surf, self.get_chunk_rect(cx, cy)
+
+    def draw(self, screen, camera=None, **kw):
+        self.dirty_rects = []
+        if camera is None:
+            seq = list(self.get_visible_chunks(screen.get_rect()))
+        else:
+            seq = [camera.project(surf, rect)
+                   for surf, rect in self.get_visible_chunks(camera.get_viewport())]
+        epg.scene.blits(screen, seq)
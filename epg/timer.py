@@ -0,0 +1,67 @@
+from time import perf_counter_ns
+
+class GameClock:
+    '''Pausable and scalable game time in float milliseconds.
+[source] is a parent GameClock (real time if None), [manual] clocks only move with step()'''
+    def __init__(self, scale=1, paused=False, source=None, manual=False):
+        self.source = source
+        self.scale = scale
+        self.paused = paused
+        self.manual = manual
+        self.time = 0.0
+        self.last = self.get_source_time()
+
+    def __repr__(self):
+        return "<GameClock time=%.3f scale=%s%s>"%(self.time, self.scale,
+            " paused" if self.paused else "")
+
+    def get_source_time(self):
+        if self.source:
+            return self.source.get_time()
+        return perf_counter_ns() / 1e6
+
+    def sync(self):
+        now = self.get_source_time()
+        if not (self.paused or self.manual):
+            self.time += (now - self.last) * self.scale
+        self.last = now
+
+    def get_time(self):
+        self.sync()
+        return self.time
+
+    def pause(self):
+        self.sync()
+        self.paused = True
+
+    def resume(self):
+        self.sync()
+        self.paused = False
+
+    def toggle(self):
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+
+    def set_scale(self, scale):
+        self.sync()
+        self.scale = scale
+
+    def step(self, ms):
+        '''Advance the time by [ms] (for paused or manual clocks)'''
+        self.sync()
+        self.time += ms
+
+    def set_time(self, ms):
+        self.sync()
+        self.time = ms
+
+    def skip(self, ms):
+        '''Drop the last [ms] of source time, e.g. time lost in event.get()'''
+        self.sync()
+        if not (self.paused or self.manual):
+            self.time -= ms * self.scale
+
+default = GameClock()
+current = default
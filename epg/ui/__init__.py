@@ -26,10 +26,15 @@ class BaseWidget(BaseUI):
         self.box.update_display()
 
 class Container(BaseWidget):
-    def __init__(self, scene, *args, **kw):
+    def __init__(self, scene, *args, subscribe=False, **kw):
         self.scene = scene
         self.box = BaseBox(*args, **kw)
         self.children = []
+        self.index = {} # event type -> widgets
+        self.last_event = None
+        self.subscribed = False
+        if subscribe:
+            self.subscribe()
 
     def map(self, *args, **kw):
         epg.throw("cannot map the container")
@@ -38,9 +43,46 @@ class Container(BaseWidget):
         epg.throw("cannot unmap the container")
 
     def events(self, event):
-        for w in self.all_children:
+        if event is self.last_event: # already dispatched this frame
+            return
+        self.last_event = event
+        for w in self.get_subscribers(event.type):
             w.events(event)
 
+    def subscribe(self):
+        '''Receive the events the widgets need from the scene's dispatcher,
+instead of having the scene pass them to events()'''
+        self.subscribed = True
+        self.changed()
+
+    def unsubscribe(self):
+        self.subscribed = False
+        self.scene.dispatcher.unsubscribe(self.events)
+
+    def changed(self):
+        '''Rebuild the event index, and the subscriptions if subscribed'''
+        self.index.clear()
+        if not self.subscribed:
+            return
+        dispatcher = self.scene.dispatcher
+        dispatcher.unsubscribe(self.events)
+        types = set()
+        for w in self.all_children:
+            if w.EVENTS is None:
+                types = {None}
+                break
+            types.update(w.EVENTS)
+        if types:
+            dispatcher.subscribe(self.events, *types)
+
+    def get_subscribers(self, type):
+        '''Return the widgets whose EVENTS include [type], in drawing order'''
+        ws = self.index.get(type)
+        if ws is None:
+            ws = self.index[type] = [w for w in self.all_children
+                                     if w.EVENTS is None or type in w.EVENTS]
+        return ws
+
     def update(self):
         for w in self.all_children:
             w.update()
@@ -52,6 +94,7 @@ class Container(BaseWidget):
 class Widget(BaseWidget):
     STATES = ("normal", "hover", "active", "disabled")
     ATTR = {}
+    EVENTS = None # event types passed to events(), None for all
 
     def __init__(self, parent, state=STATES[0], inpad=0, outpad=0, **kw):
         self.parent = parent
@@ -91,6 +134,13 @@ class Widget(BaseWidget):
     def rect(self):
         return self.box.get_outer_rect()
 
+    @property
+    def container(self):
+        parent = self.parent
+        while not isinstance(parent, Container):
+            parent = parent.parent
+        return parent
+
     def config(self, state=None, **kw):
         epg.check_attr(kw, self.ATTR)
         self.kw.update(kw)
@@ -128,10 +178,12 @@ class Widget(BaseWidget):
     def map(self, type=None, **kw):
         self.parent.children.append(self)
         self.box.map(type, **kw)
+        self.container.changed()
 
     def unmap(self):
         self.parent.children.remove(self)
         self.box.unmap()
+        self.container.changed()
 
 class SelectableWidget(Widget):
     ATTR = {"selected":False}
@@ -164,6 +216,7 @@ class SelectableWidget(Widget):
 
 class Frame(Widget):
     ATTR = {"width":0, "height":0, "relwidth":None, "relheight":None}
+    EVENTS = ()
 
     def init(self):
         size = [0, 0]
@@ -181,6 +234,7 @@ class Frame(Widget):
             
 class Button(Widget):
     ATTR = {"command":None}
+    EVENTS = (epg.MOUSEBUTTONDOWN, epg.MOUSEBUTTONUP)
 
     def command(self):
         if self["command"]:
@@ -242,6 +296,7 @@ class Radiobutton(SelectableWidget, Button):
 class Input(SelectableWidget):
     ATTR = SelectableWidget.ATTR.copy()
     ATTR.update({"index":0, "text":"", "charnum":None})
+    EVENTS = (epg.TEXTEDITING, epg.TEXTINPUT, epg.KEYDOWN)
 
     @property
     def index(self):